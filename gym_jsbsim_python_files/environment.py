@@ -1,10 +1,17 @@
 import gym
+import multiprocessing
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
 from gym_jsbsim.tasks import Shaping, HeadingControlTask
 from gym_jsbsim.simulation import Simulation
 from gym_jsbsim.visualiser import FigureVisualiser, FlightGearVisualiser
 from gym_jsbsim.aircraft import Aircraft, cessna172P
-from typing import Type, Tuple, Dict
+from typing import Type, Tuple, Dict, List, Optional, Sequence
+try:
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:  # the single-env classes do not need stable-baselines3
+    VecEnv = object
 
 
 class JsbSimEnv(gym.Env):
@@ -185,3 +192,390 @@ class NoFGJsbSimEnv(JsbSimEnv):
             raise ValueError('flightgear rendering is disabled for this class')
         else:
             super().render(mode, flightgear_blocking)
+
+
+class JsbSimVecEnv(VecEnv):
+    """
+    N JSBSim simulations stepped in-process behind the stable-baselines3
+    VecEnv interface.
+
+    Each env owns a Simulation and a Task instance. A step takes an [N, 4]
+    action array, applies each row's commands and advances every simulation,
+    then writes into preallocated [N, obs_dim] float32 observation, reward and
+    done arrays. An env whose episode ends is reset straight away; its last
+    observation goes to info['terminal_observation'], as SubprocVecEnv and
+    DummyVecEnv do. Unlike those, no step pickles data or goes through a
+    per-env gym.Env wrapper.
+
+    FlightGear output is disabled, as in NoFGJsbSimEnv, since a vectorised
+    env is for training.
+
+    With reset_ahead, every env keeps a spare simulation that a background
+    thread reinitialises while the active one flies, and a finished episode
+    only swaps the two. JSBSim holds the GIL, so this pays off when the
+    stepping thread spends its time blocked elsewhere, e.g. a
+    SharedMemoryVecEnv worker waiting on its pipe for the next step.
+    """
+    JSBSIM_DT_HZ: int = JsbSimEnv.JSBSIM_DT_HZ
+
+    def __init__(self, target_points: Sequence[Tuple[float, float]], task_type: Type[HeadingControlTask],
+                 aircraft: Aircraft = cessna172P, agent_interaction_freq: int = 5, shaping: Shaping = Shaping.STANDARD,
+                 reset_ahead: bool = False):
+        """
+        Constructor. Creates one env per target point; the simulations are
+        created by the first reset().
+
+        :param target_points: one (lat, lon) target per env
+        :param task_type: the Task subclass every env performs
+        :param aircraft: the JSBSim aircraft to be used
+        :param agent_interaction_freq: int, how many times per second the agent
+            should interact with each environment.
+        :param shaping: a HeadingControlTask.Shaping enum passed to every task
+        :param reset_ahead: bool, double-buffers each env's simulation so the
+            reset after a finished episode happens on a background thread
+        """
+        if VecEnv is object:
+            raise ImportError('JsbSimVecEnv requires stable-baselines3.')
+        if agent_interaction_freq > self.JSBSIM_DT_HZ:
+            raise ValueError('agent interaction frequency must be less than '
+                             'or equal to JSBSim integration frequency of '
+                             f'{self.JSBSIM_DT_HZ} Hz.')
+        self.sim_steps_per_agent_step: int = self.JSBSIM_DT_HZ // agent_interaction_freq
+        self.aircraft = aircraft
+        self.tasks = [task_type(shaping, agent_interaction_freq, aircraft, target_point)
+                      for target_point in target_points]
+        self.sims: List[Optional[Simulation]] = [None] * len(self.tasks)
+        # double buffering: the spare simulations are prepared by a single background thread
+        self.reset_executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=1) if reset_ahead else None
+        self.spare_sims: List[Optional[Future]] = [None] * len(self.tasks)
+        observation_space = self.tasks[0].get_state_space()
+        action_space = self.tasks[0].get_action_space()
+        super().__init__(len(self.tasks), observation_space, action_space)
+
+        self.observations = np.zeros((self.num_envs,) + observation_space.shape, dtype=np.float32)
+        self.terminal_observations = np.zeros_like(self.observations)
+        self.rewards = np.zeros(self.num_envs, dtype=np.float32)
+        self.dones = np.zeros(self.num_envs, dtype=bool)
+        self.actions = None
+
+    def _prepare_sim(self, sim: Optional[Simulation], init_conditions: Dict) -> Simulation:
+        """ Resets a simulation to the initial conditions, creating it if needed. """
+        if sim:
+            sim.reinitialise(init_conditions)
+            return sim
+        return Simulation(sim_frequency_hz=self.JSBSIM_DT_HZ,
+                          aircraft=self.aircraft,
+                          init_conditions=init_conditions,
+                          allow_flightgear_output=False)
+
+    def _reset_env(self, index: int) -> None:
+        """
+        Reinitialises one simulation and writes its first observation.
+
+        With reset_ahead the prepared spare becomes the active simulation and
+        the finished one goes to the reset thread to become the next spare.
+        The initial conditions are read here so the task is only used from
+        this thread; the first reset has no spare and prepares in place.
+        """
+        init_conditions = self.tasks[index].get_initial_conditions()
+        if not self.reset_executor:
+            self.sims[index] = self._prepare_sim(self.sims[index], init_conditions)
+        else:
+            finished = self.sims[index]
+            if self.spare_sims[index] is None:
+                self.sims[index] = self._prepare_sim(finished, init_conditions)
+                finished = None
+            else:
+                self.sims[index] = self.spare_sims[index].result()
+            self.spare_sims[index] = self.reset_executor.submit(self._prepare_sim, finished, init_conditions)
+        self.observations[index] = self.tasks[index].observe_first_state(self.sims[index])
+
+    def reset(self) -> np.ndarray:
+        """
+        Resets every environment.
+
+        :return: the [N, obs_dim] array of initial observations
+        """
+        for index in range(self.num_envs):
+            self._reset_env(index)
+        return self.observations.copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        if actions.shape != (self.num_envs,) + self.action_space.shape:
+            raise ValueError('mismatch between actions and [num_envs, action] shape')
+        self.actions = actions
+
+    def _step_envs(self) -> List[Dict]:
+        """
+        Applies the pending actions to every simulation and advances them,
+        writing the observation, reward, done and terminal observation arrays
+        in place and auto-resetting finished episodes.
+
+        :return: the task info dict of each env
+        """
+        infos = []
+        for index, (task, sim, action) in enumerate(zip(self.tasks, self.sims, self.actions)):
+            state, reward, done, info = task.task_step(sim, action, self.sim_steps_per_agent_step)
+            self.observations[index] = state
+            self.rewards[index] = reward
+            self.dones[index] = done
+            if done:
+                self.terminal_observations[index] = self.observations[index]
+                self._reset_env(index)
+            infos.append(info)
+        return infos
+
+    def step_wait(self):
+        """
+        Applies the actions given to step_async to every simulation and
+        advances them, auto-resetting finished episodes.
+
+        :return: (observations, rewards, dones, infos) for all envs
+        """
+        infos = self._step_envs()
+        for index in np.flatnonzero(self.dones):
+            infos[index]['terminal_observation'] = self.terminal_observations[index].copy()
+        return self.observations.copy(), self.rewards.copy(), self.dones.copy(), infos
+
+    def close(self) -> None:
+        if self.reset_executor:
+            self.reset_executor.shutdown(wait=True)
+            for spare in self.spare_sims:
+                if spare is not None and spare.exception() is None:
+                    spare.result().close()
+            self.spare_sims = [None] * self.num_envs
+        for sim in self.sims:
+            if sim:
+                sim.close()
+
+    def _indices(self, indices) -> List[int]:
+        if indices is None:
+            return list(range(self.num_envs))
+        if isinstance(indices, int):
+            return [indices]
+        return list(indices)
+
+    def get_attr(self, attr_name: str, indices=None) -> List:
+        """ Returns an attribute of the task of each selected env. """
+        return [getattr(self.tasks[index], attr_name) for index in self._indices(indices)]
+
+    def set_attr(self, attr_name: str, value, indices=None) -> None:
+        for index in self._indices(indices):
+            setattr(self.tasks[index], attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List:
+        """ Calls a method of the task of each selected env. """
+        return [getattr(self.tasks[index], method_name)(*method_args, **method_kwargs)
+                for index in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False] * len(self._indices(indices))
+
+    def seed(self, seed=None):
+        gym.logger.warn("Could not seed environment %s", self)
+        return [None] * self.num_envs
+
+
+def _shared_vec_env_arrays(buffer, num_envs: int, obs_shape: Tuple[int, ...], action_shape: Tuple[int, ...]) -> Dict:
+    """ Lays the step arrays of a SharedMemoryVecEnv out over one shared buffer (or sizes it if buffer is None). """
+    layout = (('observations', np.float32, (num_envs,) + obs_shape),
+              ('terminal_observations', np.float32, (num_envs,) + obs_shape),
+              ('actions', np.float32, (num_envs,) + action_shape),
+              ('rewards', np.float32, (num_envs,)),
+              ('dones', np.bool_, (num_envs,)))
+    arrays, offset = {}, 0
+    for name, dtype, shape in layout:
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if buffer is not None:
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += size
+    return arrays if buffer is not None else offset
+
+
+def _shared_vec_env_worker(remote, parent_remote, shm_name: str, block: slice, target_points, env_kwargs: Dict,
+                           num_envs: int, obs_shape: Tuple[int, ...], action_shape: Tuple[int, ...]) -> None:
+    """
+    Runs a block of envs in a subprocess. The block's JsbSimVecEnv arrays are
+    views of the shared buffer, so each command only needs a short pipe
+    message and an acknowledgement.
+    """
+    parent_remote.close()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = _shared_vec_env_arrays(shm.buf, num_envs, obs_shape, action_shape)
+    env = JsbSimVecEnv(target_points, **env_kwargs)
+    env.observations = arrays['observations'][block]
+    env.terminal_observations = arrays['terminal_observations'][block]
+    env.rewards = arrays['rewards'][block]
+    env.dones = arrays['dones'][block]
+    try:
+        while True:
+            command, data = remote.recv()
+            try:
+                if command == 'step':
+                    env.actions = arrays['actions'][block]
+                    env._step_envs()
+                    result = None
+                elif command == 'reset':
+                    env.reset()
+                    result = None
+                elif command == 'get_attr':
+                    result = env.get_attr(*data)
+                elif command == 'set_attr':
+                    result = env.set_attr(*data)
+                elif command == 'env_method':
+                    name, args, kwargs, indices = data
+                    result = env.env_method(name, *args, indices=indices, **kwargs)
+                elif command == 'close':
+                    remote.send(None)
+                    break
+                else:
+                    raise NotImplementedError(f'Unknown command {command}')
+            except Exception as e:
+                result = e
+            remote.send(result)
+    finally:
+        env.close()
+        del env, arrays
+        shm.close()
+        remote.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    Runs blocks of JSBSim envs in subprocesses that exchange actions,
+    observations, rewards, dones and terminal observations through one
+    shared-memory buffer.
+
+    A step writes the actions into shared memory, sends every worker a short
+    'step' message and waits for its acknowledgement; nothing else crosses
+    the pipes. Unlike SubprocVecEnv there is no per-step pickling of NumPy
+    arrays or info dicts, so infos only carry 'terminal_observation' for
+    finished episodes.
+    """
+
+    def __init__(self, target_points: Sequence[Tuple[float, float]], num_workers: int, task_type: Type[HeadingControlTask],
+                 aircraft: Aircraft = cessna172P, agent_interaction_freq: int = 5, shaping: Shaping = Shaping.STANDARD,
+                 start_method: str = 'spawn', reset_ahead: bool = False):
+        """
+        Constructor. Splits the envs (one per target point) into `num_workers`
+        contiguous blocks and starts one subprocess per block.
+
+        :param target_points: one (lat, lon) target per env
+        :param num_workers: number of subprocesses stepping the envs
+        :param task_type: the Task subclass every env performs
+        :param aircraft: the JSBSim aircraft to be used
+        :param agent_interaction_freq: int, how many times per second the agent
+            should interact with each environment.
+        :param shaping: a HeadingControlTask.Shaping enum passed to every task
+        :param start_method: multiprocessing start method of the workers
+        :param reset_ahead: bool, passed to each worker's JsbSimVecEnv, so a
+            finished episode's simulation is reinitialised while the worker
+            waits for the next step
+        """
+        if VecEnv is object:
+            raise ImportError('SharedMemoryVecEnv requires stable-baselines3.')
+        task = task_type(shaping, agent_interaction_freq, aircraft, target_points[0])
+        observation_space, action_space = task.get_state_space(), task.get_action_space()
+        num_envs = len(target_points)
+        super().__init__(num_envs, observation_space, action_space)
+
+        obs_shape, action_shape = observation_space.shape, action_space.shape
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=_shared_vec_env_arrays(None, num_envs, obs_shape, action_shape))
+        self.arrays = _shared_vec_env_arrays(self.shm.buf, num_envs, obs_shape, action_shape)
+        env_kwargs = dict(task_type=task_type, aircraft=aircraft, agent_interaction_freq=agent_interaction_freq,
+                          shaping=shaping, reset_ahead=reset_ahead)
+
+        context = multiprocessing.get_context(start_method)
+        bounds = np.linspace(0, num_envs, min(num_workers, num_envs) + 1).astype(int)
+        self.blocks = [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+        self.remotes, self.processes = [], []
+        for block in self.blocks:
+            remote, work_remote = context.Pipe()
+            process = context.Process(target=_shared_vec_env_worker, daemon=True,
+                                      args=(work_remote, remote, self.shm.name, block, list(target_points[block]),
+                                            env_kwargs, num_envs, obs_shape, action_shape))
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.closed = False
+
+    def _command(self, command: str, data=None, remotes=None) -> List:
+        remotes = self.remotes if remotes is None else remotes
+        for remote in remotes:
+            remote.send((command, data))
+        results = [remote.recv() for remote in remotes]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def reset(self) -> np.ndarray:
+        self._command('reset')
+        return self.arrays['observations'].copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.arrays['actions'][:] = actions
+        for remote in self.remotes:
+            remote.send(('step', None))
+
+    def step_wait(self):
+        for result in [remote.recv() for remote in self.remotes]:
+            if isinstance(result, Exception):
+                raise result
+        dones = self.arrays['dones'].copy()
+        infos = [{} for _ in range(self.num_envs)]
+        for index in np.flatnonzero(dones):
+            infos[index]['terminal_observation'] = self.arrays['terminal_observations'][index].copy()
+        return self.arrays['observations'].copy(), self.arrays['rewards'].copy(), dones, infos
+
+    def _block_indices(self, indices) -> List[Tuple[int, List[int]]]:
+        """ Groups global env indices by worker, as (worker, local indices) pairs. """
+        if indices is None:
+            indices = range(self.num_envs)
+        elif isinstance(indices, int):
+            indices = [indices]
+        grouped = {}
+        for index in indices:
+            worker = next(w for w, block in enumerate(self.blocks) if block.start <= index < block.stop)
+            grouped.setdefault(worker, []).append(index - self.blocks[worker].start)
+        return sorted(grouped.items())
+
+    def get_attr(self, attr_name: str, indices=None) -> List:
+        results = []
+        for worker, local in self._block_indices(indices):
+            results.extend(self._command('get_attr', (attr_name, local), [self.remotes[worker]])[0])
+        return results
+
+    def set_attr(self, attr_name: str, value, indices=None) -> None:
+        for worker, local in self._block_indices(indices):
+            self._command('set_attr', (attr_name, value, local), [self.remotes[worker]])
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List:
+        results = []
+        for worker, local in self._block_indices(indices):
+            data = (method_name, method_args, method_kwargs, local)
+            results.extend(self._command('env_method', data, [self.remotes[worker]])[0])
+        return results
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False] * sum(len(local) for _, local in self._block_indices(indices))
+
+    def seed(self, seed=None):
+        gym.logger.warn("Could not seed environment %s", self)
+        return [None] * self.num_envs
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for remote in self.remotes:
+            remote.recv()
+        for process in self.processes:
+            process.join()
+        self.arrays = None
+        self.shm.close()
+        self.shm.unlink()
+        self.closed = True
@@ -469,6 +469,8 @@ class NavigationTask(FlightTask):
         
         assessor = None
         super().__init__(assessor)
+        # built once: a Box costs more to construct than a whole JSBSim reset
+        self.state_space = self.get_state_space()
         #self.reset_target_point(37.6190, -122.3750)
 
     def setReward(self, distance, crashed, altitude_deviation):
@@ -592,11 +594,11 @@ class NavigationTask(FlightTask):
             r_rad,
         ], dtype=np.float32)
         
-        for i, (low, high) in enumerate(zip(self.get_state_space().low, self.get_state_space().high)):
+        for i, (low, high) in enumerate(zip(self.state_space.low, self.state_space.high)):
             if not (low <= observation[i] <= high):
                 print(f"Observation {i}: {observation[i]} is out of range! Expected: [{low}, {high}]")
         
-        assert self.get_state_space().contains(observation), f"Observation out of bounds: {observation}"
+        assert self.state_space.contains(observation), f"Observation out of bounds: {observation}"
         
         """
             observation = np.array([
@@ -716,6 +718,11 @@ class NavigationTask(FlightTask):
         
         return target_points
 
+    def set_target_point(self, target_point: Tuple[float, float]) -> None:
+        """Points the task at a new (lat, lon) target, keeping the rest of its state."""
+        self.target_point = target_point
+        self.target_lat, self.target_lon = target_point[0], target_point[1]
+
     def reset_target_point(self):
         target_points = self.create_target_points(self, start_lat=37.6190, start_lon=-122.3750)
         self.target_point = random.choice(target_points)
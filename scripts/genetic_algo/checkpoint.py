@@ -0,0 +1,73 @@
+import json
+import os
+import queue
+import threading
+import numpy as np
+
+
+def save_checkpoint(path, population, fitness, rng_state, generation, target_points, ids, parent_ids, horizon):
+  """Writes a GA checkpoint as an uncompressed .npz, replacing any previous file atomically."""
+  tmp_path = path + '.tmp'
+  with open(tmp_path, 'wb') as file:
+    np.savez(file,
+             population=population,
+             fitness=fitness,
+             rng_state=np.array(json.dumps(rng_state)),
+             generation=np.array(generation),
+             target_points=np.asarray(target_points, dtype=np.float64),
+             ids=ids,
+             parent_ids=parent_ids,
+             horizon=np.array(horizon))
+  os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+  """Reads a checkpoint written by save_checkpoint back into plain Python/NumPy values."""
+  with np.load(path) as checkpoint:
+    population = checkpoint['population']
+    # Checkpoints written before lineage ids were stored mark every genome as not yet archived
+    unknown_ids = np.full(len(population), -1, dtype=np.int64)
+    return {
+      'population': population,
+      'fitness': checkpoint['fitness'],
+      'rng_state': json.loads(str(checkpoint['rng_state'][()])),
+      'generation': int(checkpoint['generation']),
+      'target_points': [tuple(point) for point in checkpoint['target_points']],
+      'ids': checkpoint['ids'] if 'ids' in checkpoint else unknown_ids,
+      'parent_ids': checkpoint['parent_ids'] if 'parent_ids' in checkpoint else np.stack([unknown_ids] * 2, axis=1),
+      'horizon': int(checkpoint['horizon']) if 'horizon' in checkpoint else None,
+    }
+
+
+class CheckpointWriter:
+  """Saves checkpoints from a background thread so the generation loop never blocks on disk."""
+
+  def __init__(self, path):
+    self.path = path
+    self.pending = queue.Queue(maxsize=1)
+    self.thread = threading.Thread(target=self._run, daemon=True)
+    self.thread.start()
+
+  def save(self, population, fitness, rng, generation, target_points, ids, parent_ids, horizon):
+    """Queues a snapshot of the GA state; an older snapshot still waiting to be written is dropped."""
+    snapshot = (population.copy(), fitness.copy(), rng.bit_generator.state, generation, list(target_points),
+                ids.copy(), parent_ids.copy(), horizon)
+    try:
+      self.pending.get_nowait()
+    except queue.Empty:
+      pass
+    self.pending.put(snapshot)
+
+  def _run(self):
+    while True:
+      snapshot = self.pending.get()
+      if snapshot is None:
+        return
+      try:
+        save_checkpoint(self.path, *snapshot)
+      except Exception as e:
+        print(f"Error writing checkpoint: {e}")
+
+  def close(self):
+    """Waits for the last queued checkpoint to be written."""
+    self.pending.put(None)
+    self.thread.join()
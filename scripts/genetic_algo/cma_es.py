@@ -0,0 +1,114 @@
+from controller.scripts.genetic_algo.neural_network import NeuralNetwork, NumpyPolicy
+from controller.scripts.genetic_algo.simulation import (Genetic_Algorithm, EvaluationPool, save_logs, save_fitness_log,
+                                                        save_avg_fitness_log, save_pry, START_LAT, START_LON)
+import math
+import numpy as np
+
+
+class SepCMAES:
+  """
+  Separable CMA-ES (Ros & Hansen, 2008): CMA-ES restricted to a diagonal
+  covariance matrix, so sampling and every update are linear in the genome
+  size. Maximises fitness through an ask/tell interface.
+  """
+
+  def __init__(self, mean, sigma, populationSize=None, rng=None):
+    n = len(mean)
+    self.dim = n
+    self.mean = np.asarray(mean, dtype=np.float64).copy()
+    self.sigma = sigma
+    self.rng = rng if rng is not None else np.random.default_rng()
+    self.populationSize = populationSize or 4 + int(3 * math.log(n))
+    self.mu = self.populationSize // 2
+
+    weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+    self.weights = weights / weights.sum()
+    self.mu_eff = 1 / np.sum(self.weights ** 2)
+
+    self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+    self.d_sigma = 1 + 2 * max(0, math.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+    self.c_c = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+    c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+    c_mu = min(1 - c_1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+    # The diagonal model has n instead of n^2 free parameters, so it can learn faster
+    self.c_1 = min(1, c_1 * (n + 2) / 3)
+    self.c_mu = min(1 - self.c_1, c_mu * (n + 2) / 3)
+    self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+    self.diag_c = np.ones(n)
+    self.p_sigma = np.zeros(n)
+    self.p_c = np.zeros(n)
+    self.generation = 0
+
+  def ask(self):
+    """Samples a [populationSize, dim] float32 matrix of candidate genomes."""
+    z = self.rng.standard_normal((self.populationSize, self.dim))
+    self.y = z * np.sqrt(self.diag_c)
+    return (self.mean + self.sigma * self.y).astype(np.float32)
+
+  def tell(self, fitness):
+    """Updates the search distribution from the fitness of the last asked candidates."""
+    best = np.argsort(-np.asarray(fitness), kind='stable')[:self.mu]
+    y_best = self.y[best]
+    y_w = self.weights @ y_best
+    self.mean += self.sigma * y_w
+
+    self.p_sigma = (1 - self.c_sigma) * self.p_sigma \
+      + math.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff) * y_w / np.sqrt(self.diag_c)
+    p_sigma_norm = np.linalg.norm(self.p_sigma)
+    self.generation += 1
+    h_sigma = p_sigma_norm / math.sqrt(1 - (1 - self.c_sigma) ** (2 * self.generation)) \
+      < (1.4 + 2 / (self.dim + 1)) * self.chi_n
+    self.p_c = (1 - self.c_c) * self.p_c + h_sigma * math.sqrt(self.c_c * (2 - self.c_c) * self.mu_eff) * y_w
+
+    rank_mu = self.weights @ (y_best ** 2)
+    decay = 1 - self.c_1 - self.c_mu + (1 - h_sigma) * self.c_1 * self.c_c * (2 - self.c_c)
+    self.diag_c = decay * self.diag_c + self.c_1 * self.p_c ** 2 + self.c_mu * rank_mu
+    self.sigma *= math.exp((self.c_sigma / self.d_sigma) * (p_sigma_norm / self.chi_n - 1))
+
+
+class CMA_ES:
+  """Runs SepCMAES on the controller genome through the GA's persistent evaluation workers."""
+
+  def __init__(self, input_dim, output_dim, generationMax, sigma=0.1, populationSize=None, seed=None):
+    self.nn = NeuralNetwork(input_dim, output_dim)
+    self.input_dim = input_dim
+    self.output_dim = output_dim
+    self.generationMax = generationMax
+    self.sigma = sigma
+    self.populationSize = populationSize
+    self.genomeSize = NumpyPolicy(input_dim, output_dim).genome_size
+    self.rng = np.random.default_rng(seed)
+    self.bestIndividual = None
+
+  def evolve(self):
+    with open('fitness_evolution.txt', 'w'):
+      pass
+    target_points = Genetic_Algorithm.create_target_points(START_LAT, START_LON)
+    es = SepCMAES(np.zeros(self.genomeSize), self.sigma, self.populationSize, self.rng)
+    pool = EvaluationPool(self.input_dim, self.output_dim, target_points)
+    episodes = 0
+    try:
+      for i in range(self.generationMax):
+        genomes = es.ask()
+        fitness = pool.evaluate(genomes)
+        es.tell(fitness)
+        episodes += len(genomes) * len(target_points)
+
+        best = int(np.argmax(fitness))
+        if self.bestIndividual is None or fitness[best] > self.bestIndividual.fitness:
+          self.bestIndividual = pool.record(genomes[best])
+          self.bestIndividual.fitness = float(fitness[best])
+          self.nn.genome_to_model(self.bestIndividual.genome).save("best_model.h5")
+          save_logs(self.bestIndividual)
+          save_pry(self.bestIndividual)
+        save_fitness_log(self.bestIndividual, i)
+        save_avg_fitness_log(i, fitness)
+        print(f'Generation {i}, Episodes: {episodes}, Sigma: {es.sigma:.4f}, Best Fitness: {self.bestIndividual.fitness}')
+    finally:
+      pool.close()
+
+
+if __name__ == "__main__":
+  CMA = CMA_ES(8, 4, 1500)
+  CMA.evolve()
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def mix_children(genomes1, genomes2, take_first):
+  """Builds two children per parent pair: the first takes genomes1 where `take_first` is set, the second the rest."""
+  children = np.empty((2 * len(genomes1), genomes1.shape[1]), dtype=genomes1.dtype)
+  children[0::2] = np.where(take_first, genomes1, genomes2)
+  children[1::2] = np.where(take_first, genomes2, genomes1)
+  return children
+
+def uniform_crossover(genomes1, genomes2, rng):
+  """Every weight comes from either parent with equal probability."""
+  return mix_children(genomes1, genomes2, rng.random(genomes1.shape, dtype=np.float32) < 0.5)
+
+def point_crossover(genomes1, genomes2, rng, points=1):
+  """Cuts each pair of genomes at `points` random positions and alternates parents between the cuts."""
+  genome_size = genomes1.shape[1]
+  cuts = rng.integers(1, genome_size, size=(len(genomes1), points))
+  crossings = np.zeros(genomes1.shape, dtype=np.int8)
+  for cut in cuts.T:
+    crossings += np.arange(genome_size) >= cut[:, None]
+  return mix_children(genomes1, genomes2, crossings % 2 == 0)
+
+def blend_crossover(genomes1, genomes2, rng, alpha=0.5):
+  """BLX-alpha: each child weight is drawn uniformly from the parents' interval widened by alpha on both sides."""
+  difference = genomes2 - genomes1
+  children = np.empty((2 * len(genomes1), genomes1.shape[1]), dtype=genomes1.dtype)
+  for child in (children[0::2], children[1::2]):
+    u = rng.uniform(-alpha, 1 + alpha, size=genomes1.shape).astype(genomes1.dtype)
+    np.multiply(difference, u, out=child)
+    child += genomes1
+  return children
+
+def unit_index(layer_shapes):
+  """
+  Maps every genome position to the neuron it feeds: kernel[i, j] and bias[j]
+  of a layer both belong to that layer's unit j. Units are numbered across
+  all layers.
+  """
+  index = []
+  first_unit = 0
+  for (fan_in, units), _ in layer_shapes:
+    layer_units = np.arange(first_unit, first_unit + units)
+    index.append(np.tile(layer_units, fan_in))
+    index.append(layer_units)
+    first_unit += units
+  return np.concatenate(index)
+
+def layer_crossover(genomes1, genomes2, rng, units):
+  """
+  Layer-aware crossover: each neuron inherits its incoming weights and bias
+  from one parent, so units are exchanged whole instead of being spliced.
+  `units` is the map returned by unit_index.
+  """
+  take_first = rng.random((len(genomes1), int(units[-1]) + 1)) < 0.5
+  return mix_children(genomes1, genomes2, take_first[:, units])
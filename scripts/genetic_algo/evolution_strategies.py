@@ -0,0 +1,168 @@
+from controller.scripts.genetic_algo.neural_network import NeuralNetwork, NumpyPolicy
+from controller.scripts.genetic_algo.simulation import (Genetic_Algorithm, evaluate_batch, init_worker, records_fitness,
+                                                        save_fitness_log, Individual, NUM_THREADS, CHUNK_SIZE,
+                                                        START_LAT, START_LON)
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+NOISE_TABLE_SIZE = 2 ** 25  # float32 entries in the shared noise table (128 MB)
+
+
+class NoiseTable:
+  """A large block of standard normal noise in shared memory; perturbations are addressed by offset."""
+
+  def __init__(self, size=NOISE_TABLE_SIZE, seed=None, name=None):
+    if name is None:
+      self.shm = shared_memory.SharedMemory(create=True, size=size * np.dtype(np.float32).itemsize)
+      self.owner = True
+    else:
+      self.shm = shared_memory.SharedMemory(name=name)
+      self.owner = False
+    self.noise = np.ndarray((size,), dtype=np.float32, buffer=self.shm.buf)
+    if self.owner:
+      np.random.default_rng(seed).standard_normal(size, dtype=np.float32, out=self.noise)
+
+  def get(self, offset, dim):
+    return self.noise[offset:offset + dim]
+
+  def sample_offsets(self, rng, dim, n):
+    return rng.integers(0, len(self.noise) - dim + 1, size=n)
+
+  def close(self):
+    self.shm.close()
+    if self.owner:
+      self.shm.unlink()
+
+
+""" ES WORKERS """
+_es_state = {}
+
+def init_es_worker(input_dim, output_dim, target_points, noise_name, noise_size, theta_name, genome_size):
+  """Attaches a long-lived ES worker to the shared noise table and parameter vector."""
+  init_worker(input_dim, output_dim, target_points)
+  _es_state['noise'] = NoiseTable(noise_size, name=noise_name)
+  _es_state['theta_shm'] = shared_memory.SharedMemory(name=theta_name)
+  _es_state['theta'] = np.ndarray((genome_size,), dtype=np.float32, buffer=_es_state['theta_shm'].buf)
+
+def evaluate_perturbations(perturbations, sigma):
+  """Flies theta + sign * sigma * noise[offset] for every (offset, sign) pair and returns one return per pair."""
+  theta = _es_state['theta']
+  genomes = np.empty((len(perturbations), len(theta)), dtype=np.float32)
+  for i, (offset, sign) in enumerate(perturbations):
+    genomes[i] = theta + sign * sigma * _es_state['noise'].get(offset, len(theta))
+  return records_fitness(evaluate_batch(genomes)).mean(axis=1)
+
+
+def centered_ranks(values):
+  """Maps values to ranks scaled into [-0.5, 0.5], which makes the update invariant to fitness scale."""
+  ranks = np.empty(len(values), dtype=np.float32)
+  ranks[np.argsort(values, kind='stable')] = np.arange(len(values), dtype=np.float32)
+  return ranks / (len(values) - 1) - 0.5
+
+
+class Adam:
+  """Adam ascent step on a flat parameter vector."""
+
+  def __init__(self, dim, learningRate, beta1=0.9, beta2=0.999, epsilon=1e-8):
+    self.learningRate = learningRate
+    self.beta1 = beta1
+    self.beta2 = beta2
+    self.epsilon = epsilon
+    self.m = np.zeros(dim, dtype=np.float32)
+    self.v = np.zeros(dim, dtype=np.float32)
+    self.t = 0
+
+  def step(self, gradient):
+    self.t += 1
+    self.m = self.beta1 * self.m + (1 - self.beta1) * gradient
+    self.v = self.beta2 * self.v + (1 - self.beta2) * gradient * gradient
+    lr = self.learningRate * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+    return lr * self.m / (np.sqrt(self.v) + self.epsilon)
+
+
+class Evolution_Strategies:
+  """
+  OpenAI-style evolution strategies over the NeuralNetwork genome layout.
+
+  Workers share a precomputed noise table and the current parameter vector
+  through shared memory, so each generation only (offset, sign) pairs go out
+  and scalar returns come back.
+  """
+
+  def __init__(self, input_dim, output_dim, populationSize, generationMax, sigma=0.02, learningRate=0.01,
+               weightDecay=0.005, noiseTableSize=NOISE_TABLE_SIZE, seed=None):
+    self.nn = NeuralNetwork(input_dim, output_dim)
+    self.input_dim = input_dim
+    self.output_dim = output_dim
+    self.populationSize = populationSize  # Perturbations per generation, evaluated as antithetic pairs
+    self.generationMax = generationMax
+    self.sigma = sigma
+    self.weightDecay = weightDecay
+    self.noiseTableSize = noiseTableSize
+    self.genomeSize = NumpyPolicy(input_dim, output_dim).genome_size
+    self.rng = np.random.default_rng(seed)
+    self.optimizer = Adam(self.genomeSize, learningRate)
+    self.bestIndividual = None
+
+  def evolve(self):
+    target_points = Genetic_Algorithm.create_target_points(START_LAT, START_LON)
+    noise = NoiseTable(self.noiseTableSize, seed=int(self.rng.integers(2 ** 32)))
+    theta_shm = shared_memory.SharedMemory(create=True, size=self.genomeSize * np.dtype(np.float32).itemsize)
+    theta = np.ndarray((self.genomeSize,), dtype=np.float32, buffer=theta_shm.buf)
+    theta[:] = self.rng.standard_normal(self.genomeSize, dtype=np.float32) * 0.1
+    executor = ProcessPoolExecutor(max_workers=NUM_THREADS,
+                                   mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_es_worker,
+                                   initargs=(self.input_dim, self.output_dim, target_points, noise.shm.name,
+                                             self.noiseTableSize, theta_shm.name, self.genomeSize))
+    try:
+      for i in range(self.generationMax):
+        offsets = noise.sample_offsets(self.rng, self.genomeSize, self.populationSize // 2)
+        perturbations = [(int(offset), sign) for offset in offsets for sign in (1, -1)]
+        returns = self.evaluate(executor, perturbations)
+
+        # The best perturbation is rebuilt around the theta it was evaluated at, before the update moves it
+        best = int(np.argmax(returns))
+        offset, sign = perturbations[best]
+        if self.bestIndividual is None or returns[best] > self.bestIndividual.fitness:
+          self.bestIndividual = Individual(theta + sign * self.sigma * noise.get(offset, self.genomeSize))
+          self.bestIndividual.fitness = float(returns[best])
+          self.nn.genome_to_model(self.bestIndividual.genome).save("best_model.h5")
+
+        # Antithetic pairs are adjacent: weight each noise vector by (rank+ - rank-)
+        ranks = centered_ranks(returns).reshape(-1, 2)
+        weights = ranks[:, 0] - ranks[:, 1]
+        gradient = np.zeros(self.genomeSize, dtype=np.float32)
+        for weight, offset in zip(weights, offsets):
+          gradient += weight * noise.get(offset, self.genomeSize)
+        gradient /= len(returns) * self.sigma
+        theta += self.optimizer.step(gradient - self.weightDecay * theta)
+        save_fitness_log(self.bestIndividual, i)
+        print(f'Generation {i}, Mean Return: {np.mean(returns)}, Best Fitness: {self.bestIndividual.fitness}')
+    finally:
+      executor.shutdown(wait=True)
+      theta_shm.close()
+      theta_shm.unlink()
+      noise.close()
+
+  def evaluate(self, executor, perturbations):
+    """Queues the perturbations in CHUNK_SIZE work items and gathers their returns in order."""
+    returns = np.full(len(perturbations), -np.inf)
+    futures = {executor.submit(evaluate_perturbations, perturbations[start:start + CHUNK_SIZE], self.sigma): start
+               for start in range(0, len(perturbations), CHUNK_SIZE)}
+    for future in as_completed(futures):
+      start = futures[future]
+      try:
+        chunk_returns = future.result()
+        returns[start:start + len(chunk_returns)] = chunk_returns
+      except Exception as e:
+        print(f"Error in parallel simulation: {e}")
+    return returns
+
+
+if __name__ == "__main__":
+  ES = Evolution_Strategies(8, 4, 100, 1500)
+  ES.evolve()
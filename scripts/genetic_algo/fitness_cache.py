@@ -0,0 +1,41 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+class FitnessCache:
+  """Bounded LRU memo of evaluation results keyed by a hash of the genome bytes and the evaluation config."""
+
+  def __init__(self, config, max_size=10000):
+    self.config_bytes = repr(config).encode()
+    self.max_size = max_size
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def key(self, genome):
+    """Hashes the genome bytes together with the evaluation config."""
+    digest = hashlib.blake2b(self.config_bytes, digest_size=16)
+    digest.update(np.ascontiguousarray(genome).tobytes())
+    return digest.digest()
+
+  def get(self, genome):
+    """Returns the cached result for the genome, or None if it has to be flown."""
+    key = self.key(genome)
+    if key not in self.entries:
+      self.misses += 1
+      return None
+    self.hits += 1
+    self.entries.move_to_end(key)
+    return self.entries[key]
+
+  def put(self, genome, result):
+    """Stores a result, evicting the least recently used entries past max_size."""
+    key = self.key(genome)
+    self.entries[key] = result
+    self.entries.move_to_end(key)
+    while len(self.entries) > self.max_size:
+      self.entries.popitem(last=False)
+
+  def __len__(self):
+    return len(self.entries)
@@ -0,0 +1,110 @@
+import json
+import os
+import numpy as np
+
+
+class LineageArchive:
+  """
+  Append-only archive of every evaluated genome. Genomes are stored as a
+  float16 memory-mapped [n, genome] matrix and their id, generation, parent
+  ids, fitness and per-target records as a memory-mapped structured array,
+  so queries only touch the rows they need. Row i holds the genome with id i.
+  A small JSON manifest keeps the row count and the row range of every
+  generation.
+  """
+
+  def __init__(self, directory, genome_size, record_dtype, n_targets, initial_capacity=1024):
+    os.makedirs(directory, exist_ok=True)
+    self.genome_path = os.path.join(directory, 'genomes.f16')
+    self.meta_path = os.path.join(directory, 'meta.bin')
+    self.manifest_path = os.path.join(directory, 'manifest.json')
+    self.genome_size = genome_size
+    self.meta_dtype = np.dtype([
+      ('id', np.int64),
+      ('generation', np.int32),
+      ('parents', np.int64, (2,)),   # Ids of both parents, -1 for the initial population
+      ('fitness', np.float64),       # Mean setFitness over the target points
+      ('records', record_dtype, (n_targets,)),
+    ])
+    self.count = 0
+    self.generations = {}  # generation -> [first row, end row)
+    if os.path.exists(self.manifest_path):
+      with open(self.manifest_path) as file:
+        manifest = json.load(file)
+      if manifest['genome_size'] != genome_size:
+        raise ValueError(f"Archive holds genomes of {manifest['genome_size']} weights, not {genome_size}.")
+      self.count = manifest['count']
+      self.generations = {int(generation): rows for generation, rows in manifest['generations'].items()}
+    self._open(max(initial_capacity, self.count))
+
+  def _open(self, capacity):
+    """Maps both files with room for `capacity` rows, growing them on disk if needed."""
+    for path, row_bytes in ((self.genome_path, self.genome_size * 2), (self.meta_path, self.meta_dtype.itemsize)):
+      with open(path, 'ab') as file:
+        if file.tell() < capacity * row_bytes:
+          file.truncate(capacity * row_bytes)
+    self.capacity = capacity
+    self.genomes = np.memmap(self.genome_path, dtype=np.float16, mode='r+', shape=(capacity, self.genome_size))
+    self.meta = np.memmap(self.meta_path, dtype=self.meta_dtype, mode='r+', shape=(capacity,))
+
+  def __len__(self):
+    return self.count
+
+  def append(self, generation, genomes, parents, fitness, records):
+    """Archives a batch of genomes evaluated in `generation` and returns their new ids."""
+    n = len(genomes)
+    if self.count + n > self.capacity:
+      self.flush()
+      self._open(max(2 * self.capacity, self.count + n))
+    ids = np.arange(self.count, self.count + n)
+    self.genomes[ids] = genomes
+    rows = self.meta[self.count:self.count + n]
+    rows['id'] = ids
+    rows['generation'] = generation
+    rows['parents'] = parents
+    rows['fitness'] = fitness
+    rows['records'] = records
+    self.count += n
+    first, _ = self.generations.get(generation, (ids[0], None))
+    self.generations[generation] = [int(first), self.count]
+    return ids
+
+  def flush(self):
+    """Writes the mapped rows and the manifest to disk."""
+    self.genomes.flush()
+    self.meta.flush()
+    manifest = {'genome_size': self.genome_size, 'count': self.count, 'generations': self.generations}
+    tmp_path = self.manifest_path + '.tmp'
+    with open(tmp_path, 'w') as file:
+      json.dump(manifest, file)
+    os.replace(tmp_path, self.manifest_path)
+
+  def genome(self, genome_id):
+    """Returns one archived genome as float32."""
+    return self.genomes[genome_id].astype(np.float32)
+
+  def top_k(self, generation, k):
+    """Metadata rows of the `k` fittest genomes first evaluated in `generation`, best first."""
+    first, end = self.generations.get(generation, (0, 0))
+    rows = self.meta[first:end]
+    best = np.argsort(-rows['fitness'], kind='stable')[:k]
+    return np.array(rows[best])
+
+  def ancestors(self, genome_id, max_depth=None):
+    """Ids of every archived ancestor of a genome, nearest generations first."""
+    found = []
+    seen = set()
+    frontier = [genome_id]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+      parents = self.meta['parents'][np.array(frontier)].ravel()
+      frontier = [int(parent) for parent in parents if parent >= 0 and parent not in seen]
+      frontier = list(dict.fromkeys(frontier))
+      seen.update(frontier)
+      found.extend(frontier)
+      depth += 1
+    return np.array(found, dtype=np.int64)
+
+  def close(self):
+    self.flush()
+    del self.genomes, self.meta
@@ -7,6 +7,74 @@ import tensorflow as tf
 
 tf.get_logger().setLevel('ERROR')
 
+HIDDEN_UNITS = (128, 32)  # Units of the hidden Dense layers built by create_model
+
+
+def relu(x):
+  return np.maximum(x, 0, out=x)
+
+
+class NumpyPolicy:
+  """Runs the create_model Dense stack straight from a flat genome using NumPy."""
+
+  def __init__(self, input_dim, output_dim):
+    self.input_dim = input_dim
+    self.output_dim = output_dim
+    units = (input_dim,) + HIDDEN_UNITS + (output_dim,)
+    # (kernel shape, bias shape) per layer, in the same order Keras stores them in the genome
+    self.layer_shapes = [((units[i], units[i + 1]), (units[i + 1],)) for i in range(len(units) - 1)]
+    self.activations = [relu] * len(HIDDEN_UNITS) + [np.tanh]
+    self.genome_size = sum(int(np.prod(k)) + int(np.prod(b)) for k, b in self.layer_shapes)
+
+  def unpack(self, genome):
+    """Slices a genome into (kernel, bias) views per layer without copying."""
+    if genome.shape[-1] != self.genome_size:
+      raise ValueError(f"Expected a genome of {self.genome_size} weights but got {genome.shape[-1]}.")
+    layers = []
+    offset = 0
+    for kernel_shape, bias_shape in self.layer_shapes:
+      kernel_size, bias_size = int(np.prod(kernel_shape)), int(np.prod(bias_shape))
+      kernel = genome[offset:offset + kernel_size].reshape(kernel_shape)
+      offset += kernel_size
+      bias = genome[offset:offset + bias_size]
+      offset += bias_size
+      layers.append((kernel, bias))
+    return layers
+
+  def unpack_batch(self, genomes):
+    """Slices a [population, genome] matrix into [population, ...] kernel/bias views per layer."""
+    if genomes.shape[-1] != self.genome_size:
+      raise ValueError(f"Expected genomes of {self.genome_size} weights but got {genomes.shape[-1]}.")
+    population = genomes.shape[0]
+    layers = []
+    offset = 0
+    for kernel_shape, bias_shape in self.layer_shapes:
+      kernel_size, bias_size = int(np.prod(kernel_shape)), int(np.prod(bias_shape))
+      kernel = genomes[:, offset:offset + kernel_size].reshape((population,) + kernel_shape)
+      offset += kernel_size
+      bias = genomes[:, offset:offset + bias_size]
+      offset += bias_size
+      layers.append((kernel, bias))
+    return layers
+
+  def predict_batch(self, genomes, inputs):
+    """Forward pass of every genome in a [population, genome] matrix on its own [population, input_dim] row."""
+    x = np.asarray(inputs, dtype=genomes.dtype)
+    for (kernel, bias), activation in zip(self.unpack_batch(genomes), self.activations):
+      x = np.matmul(x[:, None, :], kernel)[:, 0, :]
+      x += bias
+      x = activation(x)
+    return x
+
+  def predict(self, genome, inputs):
+    """Forward pass for one genome over a [batch, input_dim] (or [input_dim]) input."""
+    x = np.asarray(inputs, dtype=genome.dtype)
+    for (kernel, bias), activation in zip(self.unpack(genome), self.activations):
+      x = x @ kernel
+      x += bias
+      x = activation(x)
+    return x
+
 
 class NeuralNetwork:
   
@@ -18,8 +86,8 @@ class NeuralNetwork:
   def create_model(self):
     """Creates and returns a neural network model."""
     model = Sequential()
-    model.add(Dense(128, input_shape=(self.input_dim,), activation='relu'))
-    model.add(Dense(32, activation='relu'))
+    model.add(Dense(HIDDEN_UNITS[0], input_shape=(self.input_dim,), activation='relu'))
+    model.add(Dense(HIDDEN_UNITS[1], activation='relu'))
     model.add(Dense(self.output_dim, activation='tanh')) 
     model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'])
     return model
@@ -59,4 +127,11 @@ class NeuralNetwork:
         random_weights = np.random.randn(*w.shape)
         genome.extend(random_weights.flatten())
     return np.array(genome)
-  
\ No newline at end of file
+
+  def check_numpy_parity(self, genome, n_samples=64, atol=1e-4):
+    """Checks that NumpyPolicy reproduces the Keras model's output for the given genome."""
+    inputs = np.random.uniform(-1, 1, size=(n_samples, self.input_dim)).astype(np.float32)
+    keras_output = self.genome_to_model(genome).predict(inputs, verbose=0)
+    numpy_output = NumpyPolicy(self.input_dim, self.output_dim).predict(np.asarray(genome, dtype=np.float32), inputs)
+    max_error = float(np.max(np.abs(keras_output - numpy_output)))
+    return max_error <= atol, max_error
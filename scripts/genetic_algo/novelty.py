@@ -0,0 +1,126 @@
+import numpy as np
+
+
+def rank_scores(values):
+  """Maps values to their ranks scaled into [0, 1], so differently scaled scores can be blended."""
+  ranks = np.empty(len(values))
+  ranks[np.argsort(values, kind='stable')] = np.arange(len(values))
+  return ranks / max(len(values) - 1, 1)
+
+
+class KDTree:
+  """
+  Static k-d tree over a [n, dim] point matrix for k-nearest-neighbour
+  queries. Nodes are stored in flat arrays and every node owns a contiguous
+  range of the permuted point order, so leaves are scanned as one NumPy slice.
+  """
+
+  def __init__(self, points, leaf_size=64):
+    self.points = np.asarray(points, dtype=np.float64)
+    self.order = np.arange(len(self.points))
+    self.start, self.end, self.split_dim, self.split_value, self.left, self.right = [], [], [], [], [], []
+    self._build(leaf_size)
+    # Leaf points are kept in tree order so a leaf is a contiguous slice
+    self.sorted_points = self.points[self.order]
+
+  def _add_node(self, start, end):
+    self.start.append(start)
+    self.end.append(end)
+    self.split_dim.append(-1)
+    self.split_value.append(0.0)
+    self.left.append(-1)
+    self.right.append(-1)
+    return len(self.start) - 1
+
+  def _build(self, leaf_size):
+    stack = [self._add_node(0, len(self.points))] if len(self.points) else []
+    while stack:
+      node = stack.pop()
+      start, end = self.start[node], self.end[node]
+      if end - start <= leaf_size:
+        continue
+      indices = self.order[start:end]
+      values = self.points[indices]
+      dim = int(np.argmax(values.max(axis=0) - values.min(axis=0)))
+      middle = (end - start) // 2
+      partition = np.argpartition(values[:, dim], middle)
+      self.order[start:end] = indices[partition]
+      self.split_dim[node] = dim
+      self.split_value[node] = float(values[partition[middle], dim])
+      self.left[node] = self._add_node(start, start + middle)
+      self.right[node] = self._add_node(start + middle, end)
+      stack.extend((self.left[node], self.right[node]))
+
+  def __len__(self):
+    return len(self.points)
+
+  def query(self, queries, k):
+    """Returns the [queries, k] distances to the k nearest points (inf-padded when fewer exist)."""
+    queries = np.asarray(queries, dtype=np.float64)
+    distances = np.full((len(queries), k), np.inf)
+    if not len(self.points):
+      return distances
+    for q, query in enumerate(queries):
+      best = distances[q]  # Squared distances, kept sorted ascending
+      stack = [(0, 0.0)]
+      while stack:
+        node, plane_distance = stack.pop()
+        if plane_distance >= best[-1]:
+          continue
+        dim = self.split_dim[node]
+        if dim < 0:
+          leaf = self.sorted_points[self.start[node]:self.end[node]]
+          candidates = np.sum((leaf - query) ** 2, axis=1)
+          best[:] = np.sort(np.concatenate((best, candidates)))[:k]
+          continue
+        offset = query[dim] - self.split_value[node]
+        near, far = (self.left[node], self.right[node]) if offset < 0 else (self.right[node], self.left[node])
+        # The far side is visited last and only if the splitting plane is closer than the current k-th neighbour
+        stack.append((far, offset * offset))
+        stack.append((near, plane_distance))
+    return np.sqrt(distances)
+
+
+class NoveltyArchive:
+  """
+  Archive of behaviour descriptors scoring novelty as the mean distance to the
+  k nearest archived or current behaviours. New entries go to a small
+  unindexed tail that is brute-forced; the k-d tree is rebuilt only once the
+  tail outgrows a fraction of the indexed archive, so insertion stays cheap
+  and queries stay logarithmic as the archive reaches tens of thousands.
+  """
+
+  def __init__(self, dim, k=15, rebuild_fraction=0.25, leaf_size=64):
+    self.k = k
+    self.rebuild_fraction = rebuild_fraction
+    self.leaf_size = leaf_size
+    self.tree = KDTree(np.empty((0, dim)), leaf_size)
+    self.tail = np.empty((0, dim))
+
+  def __len__(self):
+    return len(self.tree) + len(self.tail)
+
+  def add(self, behaviours):
+    self.tail = np.concatenate((self.tail, behaviours))
+    if len(self.tail) > max(self.leaf_size, self.rebuild_fraction * len(self.tree)):
+      self.tree = KDTree(np.concatenate((self.tree.points, self.tail)), self.leaf_size)
+      self.tail = self.tail[:0]
+
+  def novelty(self, behaviours, chunk_size=512):
+    """Novelty of every behaviour row against the archive and the other rows of `behaviours`."""
+    neighbours = [self.tree.query(behaviours, self.k)]
+    for others in (self.tail, behaviours):
+      if not len(others):
+        continue
+      count = min(self.k + 1, len(others))
+      brute = np.empty((len(behaviours), count))
+      for start in range(0, len(behaviours), chunk_size):
+        block = np.sum((behaviours[start:start + chunk_size, None] - others[None]) ** 2, axis=2)
+        brute[start:start + chunk_size] = np.sqrt(np.sort(block, axis=1)[:, :count])
+      if others is behaviours:
+        # Every row's nearest neighbour among the current behaviours is itself
+        brute = brute[:, 1:]
+      neighbours.append(brute)
+    nearest = np.sort(np.concatenate(neighbours, axis=1), axis=1)[:, :self.k]
+    known = np.isfinite(nearest)
+    return np.where(known, nearest, 0).sum(axis=1) / np.maximum(known.sum(axis=1), 1)
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def objectives_from_records(records):
+  """
+  Builds the [population, 3] objective matrix (all minimised) from a
+  [population, targets] record array: mean final distance to target, mean
+  per-step altitude error and crash rate.
+  """
+  n_steps = np.maximum(records['steps'], 1)
+  return np.stack([
+    records['distance'].mean(axis=1),
+    (records['altitude_error'] / n_steps).mean(axis=1),
+    records['crashed'].mean(axis=1),
+  ], axis=1)
+
+def dominance_matrix(objectives):
+  """dominates[i, j] is True when individual i Pareto-dominates individual j."""
+  n = len(objectives)
+  no_worse = np.ones((n, n), dtype=bool)
+  for column in objectives.T:
+    no_worse &= column[:, None] <= column[None, :]
+  # i dominates j if it is no worse everywhere and j is not also no worse everywhere (i.e. they differ)
+  return no_worse & ~no_worse.T
+
+def fast_non_dominated_sort(objectives):
+  """Returns the Pareto front index of every individual (0 is the non-dominated front)."""
+  dominates = dominance_matrix(objectives)
+  domination_count = np.count_nonzero(dominates, axis=0)
+  fronts = np.full(len(objectives), -1)
+  current = np.flatnonzero(domination_count == 0)
+  front = 0
+  while current.size:
+    fronts[current] = front
+    domination_count = domination_count - np.count_nonzero(dominates[current], axis=0)
+    domination_count[fronts >= 0] = -1
+    current = np.flatnonzero(domination_count == 0)
+    front += 1
+  return fronts
+
+def crowding_distance(objectives, fronts):
+  """Crowding distance of every individual within its own front; boundary individuals get infinity."""
+  distance = np.zeros(len(objectives))
+  for front in np.unique(fronts):
+    members = np.flatnonzero(fronts == front)
+    if members.size <= 2:
+      distance[members] = np.inf
+      continue
+    values = objectives[members]
+    order = np.argsort(values, axis=0, kind='stable')
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    span = sorted_values[-1] - sorted_values[0]
+    span[span == 0] = 1
+    gaps = np.zeros_like(values)
+    gaps[1:-1] = (sorted_values[2:] - sorted_values[:-2]) / span
+    gaps[0] = gaps[-1] = np.inf
+    contributions = np.empty_like(values)
+    np.put_along_axis(contributions, order, gaps, axis=0)
+    distance[members] = contributions.sum(axis=1)
+  return distance
+
+def nsga2_scores(objectives):
+  """
+  Scalar selection key ordering individuals by Pareto front first and
+  crowding distance second, so the GA's argmax-based tournament, elitism and
+  sorting implement NSGA-II selection unchanged.
+  """
+  fronts = fast_non_dominated_sort(objectives)
+  crowding = crowding_distance(objectives, fronts)
+  # Map crowding into [0, 0.5] so it only breaks ties inside a front
+  finite = np.isfinite(crowding)
+  spread = np.full(len(crowding), 0.5)
+  spread[finite] = 0.5 * crowding[finite] / (1 + crowding[finite])
+  return -fronts + spread
@@ -1,7 +1,19 @@
-from controller.scripts.genetic_algo.neural_network import NeuralNetwork
-import random
+from controller.scripts.genetic_algo.neural_network import NeuralNetwork, NumpyPolicy
+from controller.scripts.genetic_algo.fitness_cache import FitnessCache
+from controller.scripts.genetic_algo.checkpoint import CheckpointWriter, load_checkpoint
+from controller.scripts.genetic_algo.nsga2 import nsga2_scores, objectives_from_records
+from controller.scripts.genetic_algo.surrogate import RidgeSurrogate
+from controller.scripts.genetic_algo.novelty import NoveltyArchive, rank_scores
+from controller.scripts.genetic_algo.lineage import LineageArchive
+from controller.scripts.genetic_algo.transport import SharedGenomes, read_shared_rows
+from controller.scripts.genetic_algo.crossover import (blend_crossover, layer_crossover, point_crossover,
+                                                       uniform_crossover, unit_index)
+import queue
+import sys
+import threading
 import numpy as np
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from multiprocessing import shared_memory
 from gym_jsbsim.environment import JsbSimEnv
 from gym_jsbsim.tasks import NavigationTask  
 from gym_jsbsim.aircraft import cessna172P
@@ -31,12 +43,48 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 STEP_FREQUENCY_HZ = 5  # Frequency at which actions are sent
 EPISODE_TIME_S = 10  # Total episode duration in seconds
+HORIZON_SCHEDULE = 'none'  # 'none' flies full episodes, 'linear' grows them over HORIZON_RAMP_GENERATIONS, 'adaptive' as the population survives them
+HORIZON_MIN_S = 2  # Episode duration of the first generation under a horizon schedule
+HORIZON_RAMP_GENERATIONS = 100  # Generations for the 'linear' schedule to reach EPISODE_TIME_S
+HORIZON_STEP_S = 1  # Seconds added by the 'adaptive' schedule once enough of the population survives the current horizon
+HORIZON_SURVIVAL_RATE = 0.25  # Share of the population that must fly the whole horizon without crashing before it grows
+HORIZON_PROGRESS_SCORE = 1000  # Distance term of an episode that covers all the ground reachable within its horizon
 EARTH_RADIUS = 6371000  # Earth radius in meters
 CIRCLE_RADIUS = 250     # Circle radius in meters
 NUM_POINTS = 15         # Number of points on the circumference
 TOLERANCE_DISTANCE = 10 # Tolerance distance in meters
 ALTITUDE_THRESHOLD = 100  # Altitude threshold to detect crash or failure
 NUM_THREADS = 4
+CHUNK_SIZE = 5  # Individuals per work item pulled from the queue by a free worker in 'sequential' evaluation
+LOCKSTEP_CHUNKS_PER_WORKER = 2  # Work items per worker in 'lockstep' evaluation, so each still flies a large batch at once
+FITNESS_CACHE_SIZE = 10000  # Genomes whose fitness is remembered so they are not flown again
+SELECTION_MODE = 'fitness'  # 'fitness' ranks by setFitness, 'nsga2' by Pareto front and crowding distance, 'novelty' by behaviour novelty
+NOVELTY_WEIGHT = 1.0  # Share of the novelty rank in the 'novelty' selection key, the rest is the fitness rank
+NOVELTY_NEIGHBOURS = 15  # Nearest behaviours averaged into a novelty score
+NOVELTY_ARCHIVE_ADD = 5  # Most novel individuals added to the behaviour archive each generation
+RACING = False  # Fly target points one at a time and stop individuals that can no longer become elite
+RACING_BOUND = 'exact'  # 'exact' only drops individuals that provably cannot become elite, 'empirical' also ones unlikely to (see race)
+RACING_MARGIN = 0.1  # Slack added to the best fitness seen on each target, as a fraction of its magnitude, by the 'empirical' bound
+RACING_MAX_SPEED = 100  # Speed (m/s) the aircraft cannot exceed, bounding the full-episode fitness for the 'exact' bound
+FLIGHT_SPEED = 150 * 0.3048  # Airspeed (m/s) NavigationTask starts the aircraft at (initial_u_fps), used to bound the reachable distance
+STEADY_STATE = False  # Replace the worst member as each evaluation finishes instead of breeding whole generations
+STEADY_STATE_IN_FLIGHT = 2  # Offspring queued per worker in steady-state mode, so no worker waits for the parent
+ISLAND_COUNT = NUM_THREADS  # Sub-populations evolved in their own processes by Island_Model
+MIGRATION_INTERVAL = 10  # Generations between migrations
+MIGRANT_COUNT = 2  # Best individuals each island sends to its neighbour
+MIGRATION_TOPOLOGY = 'ring'  # 'ring' or 'random_ring' (a new ring order at every migration)
+ISLAND_POLL_S = 5  # Seconds Island_Model waits for a result before checking that the islands are still alive
+CROSSOVER = 'layer'  # 'none' (copy parents), 'uniform', 'one_point', 'two_point', 'blend' (BLX-alpha) or 'layer' (whole neurons)
+BLEND_ALPHA = 0.5  # Interval widening of the 'blend' crossover
+SURROGATE_SCREENING = 1  # Candidate offspring bred per offspring flown; above 1 a surrogate model picks which to fly
+SURROGATE_MIN_SAMPLES = 200  # Evaluations collected before the surrogate is trusted to screen offspring
+SURROGATE_EXPLORATION = 0.2  # Fraction of flown offspring picked at random from the candidates, so the surrogate keeps learning
+CHECKPOINT_PATH = 'ga_checkpoint.npz'
+LINEAGE_PATH = None  # Directory of the archive of every evaluated genome with its parents; None disables it
+CHECKPOINT_INTERVAL = 10  # Generations between checkpoints
+MAX_EVALUATION_RETRIES = 2  # Fresh simulations a failed episode is re-flown on before it is penalised
+FAILED_EPISODE_FITNESS = -2000  # Fitness of an episode whose simulation failed on every retry
+EVALUATION_MODE = 'lockstep'  # 'lockstep' flies a whole batch at once, 'sequential' one individual at a time
 START_LAT = 37.619
 START_LON = -122.3750
 
@@ -62,7 +110,8 @@ class Individual:
     
 def evaluate_individual(env, individual, input_dim, output_dim, scaler):
   """Evaluates a single individual in the provided environment instance."""
-  model = NeuralNetwork(input_dim, output_dim).genome_to_model(individual.genome)
+  policy = NumpyPolicy(input_dim, output_dim)
+  genome = np.asarray(individual.genome, dtype=np.float32)
   obs = env.reset()
   done, step_count, total_time, crashed = False, 0, 0, False
       
@@ -72,7 +121,7 @@ def evaluate_individual(env, individual, input_dim, output_dim, scaler):
 
   while not done and step_count < EPISODE_TIME_S * STEP_FREQUENCY_HZ:
     input_vector = np.array(obs).reshape(1, -1)
-    action = model.predict(input_vector, verbose=0)[0]
+    action = policy.predict(genome, input_vector)[0]
     roll, pitch, yaw = action[:3]
     throttle = (action[3] + 1) / 2
     action = np.array([roll, pitch, yaw, throttle])
@@ -128,50 +177,377 @@ def normalize_input_vector(input_vector):
   
   return normalized_vector_min_max
 
-def evaluate_individuals(individuals, input_dim, output_dim, target_points):
-  """Evaluates a batch of individuals in the provided environment instance."""
-  run_index = 1
-  for target_point in target_points:
-    env = create_env(target_point)
-    results = []
+FEATURE_NAMES = ['Pitch', 'Roll', 'Yaw', 'Throttle', 'Altitude', 'Distance', 'Yaw Angle', 'Pitch Angle']
+FEATURE_MINS = np.array([MIN_MAX_RANGES[name][0] for name in FEATURE_NAMES], dtype=np.float32)
+FEATURE_SPANS = np.array([MIN_MAX_RANGES[name][1] - MIN_MAX_RANGES[name][0] for name in FEATURE_NAMES], dtype=np.float32)
+
+def normalize_observations(observations):
+  """Vectorized normalize_input_vector over a [batch, 8] observation matrix."""
+  return (observations - FEATURE_MINS) / FEATURE_SPANS
+
+RECORD_DTYPE = np.dtype([
+  ('distance', np.float64),        # Distance to the target when the episode ended (m)
+  ('crashed', np.bool_),           # Whether the episode ended below ALTITUDE_THRESHOLD
+  ('steps', np.int32),             # Agent steps flown
+  ('altitude_error', np.float64),  # Cumulative |300 - altitude| over the episode (m)
+  ('final_lat', np.float64),       # Aircraft position when the episode ended
+  ('final_lon', np.float64),
+  ('final_altitude', np.float64),
+  ('failed', np.bool_),            # Whether the simulation raised on every attempt to fly the episode
+])
+
+def fly_episode(env, policy, genome, individual=None, run_index=1, max_steps=None):
+  """Flies one episode and returns its record fields; trajectory logs are only kept when an individual is given."""
+  if max_steps is None:
+    max_steps = EPISODE_TIME_S * STEP_FREQUENCY_HZ
+  obs = env.reset()
+  input_obs = obs[0:8]
+  done, step_count, crashed = False, 0, False
+  cumulative_altitude_dist = 0
+  info = {}
+  if individual is not None:
+    individual.log.append(f"Target Latitude: {env.task.target_point[0]:.6f}, Target Longitude: {env.task.target_point[1]:.6f}, Target Altitude: 300m")
+    individual.log.append("Step\tLatitude\tLongitude\tAltitude\tHeading")
+  
+  while not done and step_count < max_steps:
+    input_vector = normalize_observations(input_obs).reshape(1, -1)
+    if individual is not None:
+      individual.pry.append(f"Pitch (deg): {math.degrees(obs[0])}, Roll (deg): {math.degrees(obs[1])}, Yaw (deg): {math.degrees(obs[2])}")
+    action = policy.predict(genome, input_vector)[0]
+    action[3] = (action[3] + 1) / 2
+
+    obs, reward, done, info = env.step(action)
+    step_count += 1
+    current_alt = obs[4]
+    cumulative_altitude_dist += (abs(300 - current_alt))
+    crashed = current_alt <= ALTITUDE_THRESHOLD
+    if individual is not None:
+      individual.ardupilot_log[run_index].append(obs)
+      individual.log.append(f"{step_count}\t{obs[9]:.6f}\t{obs[10]:.6f}\t{current_alt}\t{math.degrees(obs[2])}")
+    input_obs = obs[0:8]
+
+  return (info.get('distance_to_target', float('inf')), crashed, step_count, cumulative_altitude_dist,
+          env.sim[prp.lat_geod_deg], env.sim[prp.lng_geoc_deg], obs[4], False)
+
+def evaluate_individuals(individuals, input_dim, output_dim, target_points, envs=None, max_steps=None):
+  """Evaluates a batch of individuals, recording their full trajectory logs."""
+  policy = NumpyPolicy(input_dim, output_dim)
+  env = envs[0] if envs else create_env(target_points[0])
+  results = []
+  for run_index, target_point in enumerate(target_points, start=1):
+    env.task.set_target_point(target_point)
     for individual in individuals:
-      model = NeuralNetwork(input_dim, output_dim).genome_to_model(individual.genome)
-      obs = env.reset()
-      input_obs = obs[0:8]
-      done, step_count, total_time, crashed = False, 0, 0, False
-      cumulative_altitude_dist = 0
-      individual.log.append(f"Target Latitude: {env.task.target_point[0]:.6f}, Target Longitude: {env.task.target_point[1]:.6f}, Target Altitude: 300m")
-      individual.log.append("Step\tLatitude\tLongitude\tAltitude\tHeading")
-      
-      while not done and step_count < EPISODE_TIME_S * STEP_FREQUENCY_HZ:
-        normalized_input_vector = normalize_input_vector(input_obs)
-        input_vector = np.array(normalized_input_vector).reshape(1, -1)
-        individual.pry.append(f"Pitch (deg): {math.degrees(obs[0])}, Roll (deg): {math.degrees(obs[1])}, Yaw (deg): {math.degrees(obs[2])}")
-        action = model.predict(input_vector, verbose=0)[0]
-        roll, pitch, yaw = action[:3]
-        throttle = (action[3] + 1) / 2
-        action = np.array([roll, pitch, yaw, throttle])
-
-        obs, reward, done, info = env.step(action)
-        step_count += 1
-        current_lat = obs[9]
-        current_lon = obs[10]
-        current_alt = obs[4]
-        cumulative_altitude_dist += (abs(300 - current_alt))
-        crashed = current_alt <= ALTITUDE_THRESHOLD
-        individual.ardupilot_log[run_index].append(obs)
-        individual.log.append(f"{step_count}\t{current_lat:.6f}\t{current_lon:.6f}\t{current_alt}\t{math.degrees(obs[2])}")
-        input_obs = obs[0:8]
- 
-      distance_to_target = info.get('distance_to_target', float('inf'))
+      genome = np.asarray(individual.genome, dtype=np.float32)
+      distance_to_target, crashed, step_count, cumulative_altitude_dist, *_ = fly_episode(env, policy, genome, individual, run_index, max_steps)
       results.append((distance_to_target, crashed, step_count, cumulative_altitude_dist, individual))
-    
-    run_index += 1
 
-  print("All individuals were evaluated!")
-  env.close()
+  if not envs:
+    env.close()
   return results    
 
+def evaluate_genomes(genomes, input_dim, output_dim, target_points, envs=None, max_steps=None):
+  """Evaluates the rows of a genome matrix one at a time and returns a [genomes, targets] record array."""
+  policy = NumpyPolicy(input_dim, output_dim)
+  env = envs[0] if envs else create_env(target_points[0])
+  records = np.zeros((len(genomes), len(target_points)), dtype=RECORD_DTYPE)
+  for t, target_point in enumerate(target_points):
+    env.task.set_target_point(target_point)
+    for i, genome in enumerate(genomes):
+      try:
+        records[i, t] = fly_episode(env, policy, genome, max_steps=max_steps)
+      except Exception as e:
+        print(f"Error in episode of genome {i}: {e}")
+        records[i, t] = failed_record()
+
+  if not envs:
+    env.close()
+  return records
+
+def evaluate_genomes_lockstep(genomes, input_dim, output_dim, target_points, envs=None, max_steps=None):
+  """Evaluates the rows of a genome matrix side by side, one env each, with one batched forward pass per step."""
+  policy = NumpyPolicy(input_dim, output_dim)
+  owns_envs = envs is None
+  envs = [create_env(target_points[0]) for _ in genomes] if owns_envs else envs[:len(genomes)]
+  if max_steps is None:
+    max_steps = EPISODE_TIME_S * STEP_FREQUENCY_HZ
+  records = np.zeros((len(genomes), len(target_points)), dtype=RECORD_DTYPE)
+
+  for t, target_point in enumerate(target_points):
+    record = records[:, t]
+    record['distance'] = float('inf')
+    observations = np.empty((len(envs), input_dim), dtype=np.float32)
+    active = []
+    for i, env in enumerate(envs):
+      try:
+        env.task.set_target_point(target_point)
+        observations[i] = env.reset()[0:input_dim]
+        active.append(i)
+      except Exception as e:
+        print(f"Error in episode of genome {i}: {e}")
+        record[i] = failed_record()
+    active = np.array(active, dtype=np.intp)
+
+    while active.size and record['steps'][active[0]] < max_steps:
+      actions = policy.predict_batch(genomes[active], normalize_observations(observations[active]))
+      actions[:, 3] = (actions[:, 3] + 1) / 2
+      still_active = []
+      for i, action in zip(active, actions):
+        try:
+          obs, reward, done, info = envs[i].step(action)
+        except Exception as e:
+          # A failing simulation only retires its own individual from the batch
+          print(f"Error in episode of genome {i}: {e}")
+          record[i] = failed_record()
+          continue
+        current_alt = obs[4]
+        record['steps'][i] += 1
+        record['altitude_error'][i] += abs(300 - current_alt)
+        record['crashed'][i] = current_alt <= ALTITUDE_THRESHOLD
+        record['distance'][i] = info.get('distance_to_target', float('inf'))
+        observations[i] = obs[0:input_dim]
+        if not done:
+          still_active.append(i)
+      # Individuals whose episode terminated are retired from the batch
+      active = np.array(still_active, dtype=np.intp)
+
+    # The observation holds no position, so the final one is read from each simulation
+    for i, env in enumerate(envs):
+      if not record['failed'][i]:
+        record['final_lat'][i], record['final_lon'][i] = env.sim[prp.lat_geod_deg], env.sim[prp.lng_geoc_deg]
+        record['final_altitude'][i] = env.sim[prp.altitude_agl_ft] * 0.3048
+
+  if owns_envs:
+    for env in envs:
+      env.close()
+  return records
+
+""" EVALUATION WORKERS """
+_worker_state = {}
+
+def init_worker(input_dim, output_dim, target_points):
+  """Runs once in each long-lived evaluation worker; simulations are kept for the worker's lifetime."""
+  os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+  _worker_state['input_dim'] = input_dim
+  _worker_state['output_dim'] = output_dim
+  _worker_state['target_points'] = target_points
+  _worker_state['envs'] = []
+
+def worker_envs(n):
+  """Returns `n` of this worker's cached environments, creating any that are missing."""
+  envs = _worker_state['envs']
+  while len(envs) < n:
+    envs.append(create_env(_worker_state['target_points'][0]))
+  return envs[:n]
+
+def replace_worker_env(index):
+  """Swaps one of the worker's cached environments for a fresh simulation."""
+  envs = _worker_state['envs']
+  try:
+    envs[index].close()
+  except Exception as e:
+    print(f"Error closing failed simulation: {e}")
+  envs[index] = create_env(_worker_state['target_points'][0])
+
+def retry_episode(genome, target_point, max_steps=None):
+  """
+  Re-flies a failed episode on a fresh simulation up to MAX_EVALUATION_RETRIES
+  times, returning a failed record if every attempt raises.
+  """
+  policy = NumpyPolicy(_worker_state['input_dim'], _worker_state['output_dim'])
+  for attempt in range(MAX_EVALUATION_RETRIES):
+    env = create_env(target_point)
+    try:
+      return fly_episode(env, policy, genome, max_steps=max_steps)
+    except Exception as e:
+      print(f"Error in episode retry {attempt + 1}: {e}")
+    finally:
+      env.close()
+  return failed_record()
+
+def evaluate_batch(genomes, target_index=None, max_steps=None):
+  """
+  Evaluates a genome matrix on the worker's cached simulations, on one or all
+  target points. Episodes whose simulation raised are re-flown on their own,
+  so a bad genome or a broken simulation never fails the whole batch.
+  """
+  lockstep = EVALUATION_MODE == 'lockstep'
+  evaluate = evaluate_genomes_lockstep if lockstep else evaluate_genomes
+  envs = worker_envs(len(genomes) if lockstep else 1)
+  target_points = _worker_state['target_points']
+  if target_index is not None:
+    target_points = target_points[target_index:target_index + 1]
+  records = evaluate(genomes, _worker_state['input_dim'], _worker_state['output_dim'], target_points, envs, max_steps)
+
+  failed_rows, failed_targets = np.nonzero(records['failed'])
+  if len(failed_rows):
+    for index in (np.unique(failed_rows) if lockstep else [0]):
+      replace_worker_env(index)
+    for i, t in zip(failed_rows, failed_targets):
+      records[i, t] = retry_episode(genomes[i], target_points[t], max_steps)
+  return records
+
+def evaluate_shared_rows(name, shape, dtype, rows, target_index=None, max_steps=None):
+  """Evaluates rows of a population published with SharedGenomes, so only their indices cross the process boundary."""
+  return evaluate_batch(read_shared_rows(name, shape, dtype, rows), target_index, max_steps)
+
+def record_trajectories(genome):
+  """Re-flies a single genome on every target point to produce the logs of a saved individual."""
+  individual = Individual(genome)
+  evaluate_individuals([individual], _worker_state['input_dim'], _worker_state['output_dim'],
+                       _worker_state['target_points'], worker_envs(1))
+  return individual
+
+
+class EvaluationPool:
+  """Evaluation workers that are spawned once and reused for every generation."""
+
+  def __init__(self, input_dim, output_dim, target_points, num_workers=NUM_THREADS, chunk_size=None):
+    self.target_points = target_points
+    self.num_workers = num_workers
+    self.chunk_size = chunk_size
+    self.executor = ProcessPoolExecutor(max_workers=num_workers,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_worker,
+                                        initargs=(input_dim, output_dim, target_points))
+
+  def submit(self, genomes, target_index=None, max_steps=None):
+    return self.executor.submit(evaluate_batch, genomes, target_index, max_steps)
+
+  def chunk_length(self, n):
+    """
+    Rows per work item when queueing `n` rows. Lockstep evaluation flies a
+    work item as one batch, so it is split into only LOCKSTEP_CHUNKS_PER_WORKER
+    items per worker, trading some load balancing for large batched forward
+    passes; sequential evaluation uses small CHUNK_SIZE items.
+    """
+    if self.chunk_size is not None:
+      return self.chunk_size
+    if EVALUATION_MODE == 'lockstep':
+      return max(1, math.ceil(n / (LOCKSTEP_CHUNKS_PER_WORKER * self.num_workers)))
+    return CHUNK_SIZE
+
+  def submit_chunks(self, genomes, target_index=None, max_steps=None):
+    """
+    Queues the genome rows as work items that idle workers pull as they free
+    up. Returns a dict mapping each future to its row slice.
+    """
+    size = self.chunk_length(len(genomes))
+    return {self.submit(genomes[start:start + size], target_index, max_steps): slice(start, start + size)
+            for start in range(0, len(genomes), size)}
+
+  def submit_rows(self, shared, rows, target_index=None, max_steps=None):
+    return self.executor.submit(evaluate_shared_rows, shared.name, shared.shape, shared.genomes.dtype, rows,
+                                target_index, max_steps)
+
+  def submit_row_chunks(self, shared, rows, target_index=None, max_steps=None):
+    """Like submit_chunks, for rows of a population published with SharedGenomes."""
+    size = self.chunk_length(len(rows))
+    return {self.submit_rows(shared, rows[start:start + size], target_index, max_steps): slice(start, start + size)
+            for start in range(0, len(rows), size)}
+
+  def evaluate(self, genomes):
+    """Flies every genome on all target points and returns its average fitness (-inf if its evaluation failed)."""
+    fitness = np.full(len(genomes), -np.inf)
+    futures = self.submit_chunks(genomes)
+    for future in as_completed(futures):
+      try:
+        fitness[futures[future]] = records_fitness(future.result()).mean(axis=1)
+      except Exception as e:
+        print(f"Error in parallel simulation: {e}")
+    return fitness
+
+  def record(self, genome):
+    """Returns an Individual carrying the trajectory logs of the given genome."""
+    return self.executor.submit(record_trajectories, genome).result()
+
+  def close(self):
+    self.executor.shutdown(wait=True)
+
+
+class LocalEvaluationPool(EvaluationPool):
+  """Same interface as EvaluationPool, but evaluates in the calling process (for GAs already running in a worker)."""
+
+  def __init__(self, input_dim, output_dim, target_points, chunk_size=None):
+    init_worker(input_dim, output_dim, target_points)
+    self.target_points = target_points
+    self.num_workers = 1
+    self.chunk_size = chunk_size
+
+  def submit(self, genomes, target_index=None, max_steps=None):
+    future = Future()
+    try:
+      future.set_result(evaluate_batch(genomes, target_index, max_steps))
+    except Exception as e:
+      future.set_exception(e)
+    return future
+
+  def submit_rows(self, shared, rows, target_index=None, max_steps=None):
+    return self.submit(shared.genomes[rows], target_index, max_steps)
+
+  def record(self, genome):
+    return record_trajectories(genome)
+
+  def close(self):
+    for env in _worker_state['envs']:
+      env.close()
+    _worker_state['envs'] = []
+
+
+def failed_record():
+  """Record of an episode whose simulation raised: counted as a crash that never got closer to the target."""
+  record = np.zeros((), dtype=RECORD_DTYPE)
+  record['distance'] = float('inf')
+  record['crashed'] = True
+  record['failed'] = True
+  return record
+
+def reachable_distance(max_steps):
+  """Ground towards the target an aircraft can cover in `max_steps` steps, at most the whole circle radius."""
+  return min(FLIGHT_SPEED * max_steps / STEP_FREQUENCY_HZ, CIRCLE_RADIUS)
+
+def records_fitness(records, max_steps=None):
+  """
+  Fitness of each record (one genome on one target point). Under a horizon
+  schedule `max_steps` is the horizon flown, and the distance term becomes
+  the progress towards the target as a fraction of the distance reachable
+  within it, so fitness stays comparable as the horizon grows; the other
+  terms are already per-step.
+  """
+  n_steps = np.maximum(records['steps'], 1)
+  avg_altitude_dist = records['altitude_error'] / n_steps
+  crash_penalty = np.where(records['crashed'], -1000, 0)
+  if max_steps is None:
+    distance_term = (((1 / (records['distance'] + 1)) * 1000) / n_steps) * 250
+  else:
+    progress = (CIRCLE_RADIUS - records['distance']) / reachable_distance(max_steps)
+    distance_term = HORIZON_PROGRESS_SCORE * np.clip(progress, 0, 1)
+  fitness = distance_term + crash_penalty - avg_altitude_dist
+  return np.where(records['failed'], FAILED_EPISODE_FITNESS, fitness)
+
+def target_fitness_bound(max_steps=None):
+  """
+  Upper bound on records_fitness for one target point. Under a horizon
+  schedule the distance term never exceeds HORIZON_PROGRESS_SCORE; otherwise
+  the aircraft is assumed to close in at RACING_MAX_SPEED and reach the
+  target, without crashing or altitude error.
+  """
+  if max_steps is not None:
+    return float(HORIZON_PROGRESS_SCORE)
+  steps = np.arange(1, EPISODE_TIME_S * STEP_FREQUENCY_HZ + 1)
+  closest = np.maximum(CIRCLE_RADIUS - RACING_MAX_SPEED * steps / STEP_FREQUENCY_HZ, 0)
+  return float(np.max(((1 / (closest + 1)) * 1000) / steps * 250))
+
+def records_behaviour(records):
+  """
+  Behaviour descriptor of each genome from its [genomes, targets] records:
+  the final north/east offset from the start in circle radii and the final
+  altitude relative to the 300 m target, for every target point.
+  """
+  north = np.radians(records['final_lat'] - START_LAT) * EARTH_RADIUS / CIRCLE_RADIUS
+  east = np.radians(records['final_lon'] - START_LON) * EARTH_RADIUS * math.cos(math.radians(START_LAT)) / CIRCLE_RADIUS
+  altitude = records['final_altitude'] / 300
+  return np.stack([north, east, altitude], axis=2).reshape(len(records), -1)
+
 
 class Genetic_Algorithm():
 
@@ -184,10 +560,30 @@ class Genetic_Algorithm():
     self.mutationProb = mutationProb
     self.tournamentSize = tournamentSize
     self.elitismRate = elitismRate
-    self.population = []
+    policy = NumpyPolicy(input_dim, output_dim)
+    self.genomeSize = policy.genome_size
+    self.horizon = EPISODE_TIME_S * STEP_FREQUENCY_HZ if HORIZON_SCHEDULE == 'none' else HORIZON_MIN_S * STEP_FREQUENCY_HZ
+    self.unitIndex = unit_index(policy.layer_shapes)
+    self.rng = np.random.default_rng()
+    self.population = np.empty((0, self.genomeSize), dtype=np.float32)
+    self.fitness = np.empty(0)
+    self.ids = np.empty(0, dtype=np.int64)  # Lineage archive id of each population row, -1 until archived
+    self.parentIds = np.empty((0, 2), dtype=np.int64)
+    self.records = np.zeros((0, 0), dtype=RECORD_DTYPE)
+    self.flown_targets = np.zeros(0, dtype=np.int32)
+    self.targetBest = None  # Best fitness flown so far on each target point, used by the 'empirical' racing bound
+    self.survivalRate = None
+    self.pool = None
+    self.fitness_cache = None
+    self.checkpoint_writer = None
+    self.surrogate = None
+    self.novelty_archive = None
+    self.lineage = None
+    self.shared_population = SharedGenomes()
     self.bestIndividual = None 
     
-  def calculate_circle_point(self, lat, lon, radius, angle):
+  @staticmethod
+  def calculate_circle_point(lat, lon, radius, angle):
     """
     This function calculates a point on the surface of the Earth
     """
@@ -199,7 +595,8 @@ class Genetic_Algorithm():
                                         math.cos(radius / EARTH_RADIUS) - math.sin(lat_rad) * math.sin(new_lat_rad))
     return math.degrees(new_lat_rad), math.degrees(new_lon_rad)
     
-  def generate_equally_spaced_target_points(self, n=3, radius=CIRCLE_RADIUS):
+  @staticmethod
+  def generate_equally_spaced_target_points(n=3, radius=CIRCLE_RADIUS):
     """
     Generates `n` equally spaced points on a circle.
     """
@@ -215,127 +612,209 @@ class Genetic_Algorithm():
 
     return points
 
-  def create_target_points(self, start_lat, start_lon, radius=CIRCLE_RADIUS, n=3):
+  @staticmethod
+  def create_target_points(start_lat, start_lon, radius=CIRCLE_RADIUS, n=3):
     """
     Creates `n` equally spaced target points around a circle centered at the
     provided (start_lat, start_lon), using a given radius in meters.
     """
-    circle_points = self.generate_equally_spaced_target_points(n, radius)
+    circle_points = Genetic_Algorithm.generate_equally_spaced_target_points(n, radius)
     
     target_points = []
     for point in circle_points:
         x, y = point
         angle = np.degrees(np.arctan2(y, x))
-        target_lat, target_lon = self.calculate_circle_point(start_lat, start_lon, radius, angle)
+        target_lat, target_lon = Genetic_Algorithm.calculate_circle_point(start_lat, start_lon, radius, angle)
         target_points.append((target_lat, target_lon))
     
     return target_points
            
-  def parallel_simulation(self, target_points):
-    """Runs a parallel simulation using multiple environments and threads."""
-    batch_size = self.maxPopulation // NUM_THREADS
+  def parallel_simulation(self):
+    """Runs a parallel simulation on the persistent evaluation workers."""
+    n_targets = len(self.pool.target_points)
+    self.fitness = np.full(self.maxPopulation, np.nan)
+    self.records = np.zeros((self.maxPopulation, n_targets), dtype=RECORD_DTYPE)
+    self.flown_targets = np.zeros(self.maxPopulation, dtype=np.int32)
+
+    pending = []
+    for index in range(len(self.population)):
+      cached_records = self.fitness_cache.get(self.population[index]) if self.fitness_cache is not None else None
+      if cached_records is not None:
+        self.records[index] = cached_records
+        self.flown_targets[index] = n_targets
+        self.fitness[index] = self.setFitness(cached_records).mean()
+      else:
+        pending.append(index)
+    pending = np.array(pending, dtype=np.intp)
+
+    self.shared_population.publish(self.population)
+    if RACING and SELECTION_MODE == 'fitness' and n_targets > 1:
+      self.race(pending)
+    else:
+      self.fly(pending)
+
+    if self.surrogate is not None:
+      flown = pending[self.flown_targets[pending] == n_targets]
+      self.surrogate.add(self.population[flown], self.setFitness(self.records[flown]).mean(axis=1))
+
+    # Failed episodes have no final position or meaningful objectives, so those genomes are left out of
+    # Pareto and novelty scoring and rank last
+    scored = (self.flown_targets == n_targets) & ~self.records['failed'].any(axis=1)
+    if SELECTION_MODE == 'nsga2':
+      # Pareto front and crowding distance replace the weighted fitness as the selection key
+      self.fitness = np.full(self.maxPopulation, -np.inf)
+      self.fitness[scored] = nsga2_scores(objectives_from_records(self.records[scored]))
+    elif SELECTION_MODE == 'novelty':
+      self.select_by_novelty(scored)
+
+    evaluated = self.records[self.flown_targets == n_targets]
+    if len(evaluated):
+      # Share of the population that flew the whole horizon without crashing, read by the adaptive horizon schedule
+      self.survivalRate = np.all((evaluated['steps'] >= self.horizon) & ~evaluated['crashed'], axis=1).mean()
+
+    # Individuals that could not be evaluated rank last
+    self.fitness[np.isnan(self.fitness)] = -np.inf
     
+    gc.collect()
+    print("All episodes completed.")
 
-    with ProcessPoolExecutor(max_workers=NUM_THREADS) as executor:
-      futures = []
-      
-      for i in range(NUM_THREADS):
-        #scaler = MinMaxScaler(feature_range=(-1, 1)) 
-        batch_start = i * batch_size
-        batch_end = batch_start + batch_size
-        batch = self.population[batch_start:batch_end]
-        population_updated = []
-        futures.append(
-          executor.submit(evaluate_individuals, batch, self.input_dim, self.output_dim, target_points)
-        )
-                
-      for future in as_completed(futures):
-        try:
-          batch_results = future.result()
-          
-          fitness_results = {}
-          
-          for distance_to_target, crashed, step_count, cumulative_altitude_dist, individual in batch_results:
-            current_fitness = self.setFitness(individual, distance_to_target, crashed, step_count, cumulative_altitude_dist)
-            population_updated.append(individual)
-
-            if individual not in fitness_results:
-              fitness_results[individual] = []
-
-            fitness_results[individual].append(current_fitness)
-            
-            if len(fitness_results[individual]) == 3:
-              avg_fitness = sum(fitness_results[individual]) / 3  
-              individual.fitness = avg_fitness
-              
-            if self.bestIndividual == None or self.bestIndividual.fitness < current_fitness:
-              self.bestIndividual = individual
+  def fly(self, indices, target_index=None):
+    """Flies the given population rows on one target point (or all of them) and stores their records."""
+    n_targets = len(self.pool.target_points)
+    targets = slice(None) if target_index is None else slice(target_index, target_index + 1)
+    futures = self.pool.submit_row_chunks(self.shared_population, indices, target_index, self.horizon)
+    if self.targetBest is None:
+      self.targetBest = np.full(n_targets, -np.inf)
 
-        except Exception as e:
-          print(f"Error in parallel simulation: {e}")
+    for future in as_completed(futures):
+      rows = indices[futures[future]]
+      try:
+        self.records[rows, targets] = future.result()
+        self.flown_targets[rows] += len(self.records[0, targets])
+        flown_best = self.setFitness(self.records[rows, targets]).max(axis=0)
+        self.targetBest[targets] = np.maximum(self.targetBest[targets], flown_best)
+      except Exception as e:
+        print(f"Error in parallel simulation: {e}")
 
-      self.population = population_updated
-      
-      gc.collect()
-      print("All episodes completed.")
+    complete = indices[self.flown_targets[indices] == n_targets]
+    self.fitness[complete] = self.setFitness(self.records[complete]).mean(axis=1)
+    if self.fitness_cache is not None:
+      for index in complete:
+        self.fitness_cache.put(self.population[index], self.records[index].copy())
+
+  def race(self, indices):
+    """
+    Flies target points one at a time, first finishing the most promising
+    individuals to set the elite threshold, then dropping every individual
+    whose optimistic average fitness falls below that threshold.
+
+    With RACING_BOUND = 'exact' the optimistic fitness on a target still to
+    fly is a true upper bound, so the elites are the same as when flying
+    everyone. That bound is tight under a horizon schedule but loose for the
+    full-episode fitness, where little is dropped. With 'empirical' it is the
+    best fitness seen on the target plus RACING_MARGIN: far more is dropped,
+    but an individual with an unusually good score on a later target can be
+    dropped from the elite, so racing becomes approximate.
+    """
+    n_targets = len(self.pool.target_points)
+    elitism_count = max(1, int(self.elitismRate * self.maxPopulation))
+
+    self.fly(indices, 0)
+    survivors = indices[self.flown_targets[indices] == 1]
+    survivors = survivors[np.argsort(-self.setFitness(self.records[survivors, 0]), kind='stable')]
+    for target_index in range(1, n_targets):
+      self.fly(survivors[:elitism_count], target_index)
+    survivors = survivors[elitism_count:]
+    if RACING_BOUND == 'exact':
+      bound = target_fitness_bound(None if HORIZON_SCHEDULE == 'none' else self.horizon)
+      target_bound = np.full(n_targets, bound)
+    else:
+      # Targets nobody has completed yet cannot bound anyone
+      target_bound = np.where(np.isfinite(self.targetBest), self.targetBest + RACING_MARGIN * np.abs(self.targetBest), np.inf)
+
+    for target_index in range(1, n_targets):
+      known = self.fitness[np.isfinite(self.fitness)]
+      threshold = np.sort(known)[-elitism_count] if len(known) >= elitism_count else -np.inf
+      partial = self.setFitness(self.records[survivors, :target_index]).sum(axis=1)
+      best_case = (partial + target_bound[target_index:].sum()) / n_targets
+      # Individuals that cannot reach the elite keep their partial average for tournament selection
+      dropped = best_case < threshold
+      self.fitness[survivors[dropped]] = partial[dropped] / target_index
+      survivors = survivors[~dropped]
+      self.fly(survivors, target_index)
+      survivors = survivors[self.flown_targets[survivors] == target_index + 1]
     
+  def select_by_novelty(self, evaluated):
+    """
+    Replaces the fitness of the evaluated individuals with a blend of their
+    novelty and fitness ranks, then archives the most novel behaviours.
+    """
+    if self.novelty_archive is None:
+      self.novelty_archive = NoveltyArchive(3 * len(self.pool.target_points), NOVELTY_NEIGHBOURS)
+    behaviours = records_behaviour(self.records[evaluated])
+    novelty = self.novelty_archive.novelty(behaviours)
+    fitness = self.setFitness(self.records[evaluated]).mean(axis=1)
+    self.fitness = np.full(self.maxPopulation, -np.inf)
+    self.fitness[evaluated] = NOVELTY_WEIGHT * rank_scores(novelty) + (1 - NOVELTY_WEIGHT) * rank_scores(fitness)
+    self.novelty_archive.add(behaviours[np.argsort(-novelty)[:NOVELTY_ARCHIVE_ADD]])
+
   """Genetic Algorithm Functions"""
   
-  def setFitness(self, indiviual, distance, crashed, n_steps, cumulative_altitude_dist):
-    """ Sets the fitness of the individual"""
-    avg_altitude_dist = cumulative_altitude_dist / n_steps
-    crash_penalty = -1000 if crashed else 0
-    fitness = (((1 / (distance + 1)) * 1000) / n_steps) * 250 + crash_penalty - avg_altitude_dist
-    #print(f'FITNESS: {fitness} || DISTANCE: {distance} || CRASH: {crash_penalty}')
-    indiviual.fitness = fitness
-    return fitness
+  def setFitness(self, records):
+    """ Computes the fitness of each record (one individual on one target point)"""
+    return records_fitness(records, None if HORIZON_SCHEDULE == 'none' else self.horizon)
       
   def generatePopulation(self): 
-    """Creates a number of random genomes and adds them into the population as (genome, fitness) tuples"""
-    self.population = [Individual(self.nn.generate_random_genome(self.nn)) for _ in range(self.maxPopulation)]
-    id = 1
-    for i in self.population:
-      i.id=id
-      id+=1
+    """Creates the [population, genome] matrix of random genomes"""
+    self.population = self.rng.standard_normal((self.maxPopulation, self.genomeSize), dtype=np.float32)
+    self.fitness = np.full(self.maxPopulation, np.nan)
+    self.ids = np.full(self.maxPopulation, -1, dtype=np.int64)
+    self.parentIds = np.full((self.maxPopulation, 2), -1, dtype=np.int64)
+
+  def sort_population(self):
+    """Orders the population matrix and fitness vector from best to worst"""
+    order = np.argsort(-self.fitness, kind='stable')
+    self.population = self.population[order]
+    self.fitness = self.fitness[order]
+    self.ids = self.ids[order]
+    self.parentIds = self.parentIds[order]
       
   def keep_elite(self):
-    """Keeps the elite of the genomes for the next generation"""
+    """Returns the population rows of the elite kept for the next generation"""
     elitism_count = int(self.elitismRate * self.maxPopulation)
-    new_population = []
-    for i in range(0, elitism_count):
-      new_population.append(self.population[i])
-    return new_population
+    return np.argpartition(-self.fitness, elitism_count - 1)[:elitism_count] if elitism_count else np.arange(0)
   
-  def tournament_selection(self):
-    """Used to select the parents for crossover but in a tournament style"""
-    tournament_population = []
-    for i in range(0, self.tournamentSize):
-      tournament_population.append(random.choice(self.population))
-      
-    tournament_population.sort(key=lambda Ind: Ind.fitness, reverse=True)
-    return tournament_population[0]
+  def tournament_selection(self, n):
+    """Selects `n` parents for crossover, each the winner of a random tournament"""
+    contenders = self.rng.integers(0, len(self.population), size=(n, self.tournamentSize))
+    winners = np.argmax(self.fitness[contenders], axis=1)
+    return contenders[np.arange(n), winners]
   
-  def crossover(self, new_population, parent1, parent2):
-    """Creates new genomes based on previous genomes of the previous generation"""
-    #crossOverPoint = random.randint(0, len(parent1))
-    #child1 = np.concatenate((parent1[:crossOverPoint], parent2[crossOverPoint:]))
-    #child2 = np.concatenate((parent2[:crossOverPoint], parent1[crossOverPoint:]))
-
-    new_population.append(Individual(parent1))
-    new_population.append(Individual(parent2))
+  def crossover(self, parents1, parents2):
+    """Creates two children per pair of parent indices with the CROSSOVER operator"""
+    genomes1, genomes2 = self.population[parents1], self.population[parents2]
+    if CROSSOVER == 'none':
+      children = np.empty((2 * len(parents1), self.genomeSize), dtype=self.population.dtype)
+      children[0::2] = genomes1
+      children[1::2] = genomes2
+      return children
+    if CROSSOVER == 'uniform':
+      return uniform_crossover(genomes1, genomes2, self.rng)
+    if CROSSOVER == 'one_point':
+      return point_crossover(genomes1, genomes2, self.rng, points=1)
+    if CROSSOVER == 'two_point':
+      return point_crossover(genomes1, genomes2, self.rng, points=2)
+    if CROSSOVER == 'blend':
+      return blend_crossover(genomes1, genomes2, self.rng, BLEND_ALPHA)
+    if CROSSOVER == 'layer':
+      return layer_crossover(genomes1, genomes2, self.rng, self.unitIndex)
+    raise ValueError(f"Unknown crossover operator: {CROSSOVER}")
     
-  def mutate(self, genome):
-    """Mutates each new genome made by the crossover feature"""
-    for i in range(0, len(genome)):
-      mutation_flag = random.random()
-      if mutation_flag < self.mutationProb:
-        
-        factor = random.uniform(-0.1, 0.1)
-        genome[i] += factor 
-        if genome[i] > 1:
-          genome[i] = 1
-        if genome[i] < -1:
-          genome[i] = -1
+  def mutate(self, genomes):
+    """Mutates, in place, each new genome made by the crossover feature"""
+    mask = self.rng.random(genomes.shape, dtype=np.float32) < self.mutationProb
+    factors = self.rng.uniform(-0.1, 0.1, size=genomes.shape).astype(genomes.dtype)
+    np.copyto(genomes, np.clip(genomes + factors, -1, 1), where=mask)
   
   def evolve(self):
 
@@ -344,47 +823,363 @@ class Genetic_Algorithm():
     file.close()
     target_points = self.create_target_points(START_LAT, START_LON)
     self.generatePopulation()
-        
-    for i in range(0, self.generationMax):
-      self.parallel_simulation(target_points) 
-      self.population.sort(key=lambda Ind: Ind.fitness, reverse=True)
-        
-      self.bestIndividual = self.population[0]
-      if self.bestIndividual != None:
-        best_model = self.nn.genome_to_model(self.bestIndividual.genome)
-        best_model.save("best_model.h5")
-        save_logs(self.bestIndividual)
-        save_fitness_log(self.bestIndividual, i)
-        save_pry(self.bestIndividual)
-        save_avg_fitness_log(i, self.population)
-        
-        #output_folder = "log_files"
-        #for episode_number, episode_data in self.bestIndividual.ardupilot_log.items():
-        #  output_file = os.path.join(output_folder, f"simulation_{episode_number}.tlog")
-        #  observations_to_tlog(episode_data, 1, output_file)
-              
-      print(f'Generation {i}, Best Fitness: {self.bestIndividual.fitness}')
-        
-      new_population = self.keep_elite()
-        
-      old_pop_len = len(self.population)
-        
-      while len(new_population) < old_pop_len:
-        parent1 = self.tournament_selection()
-        parent2 = self.tournament_selection()
-        self.crossover(new_population, parent1.genome, parent2.genome)
-        
-      for i in range(int(self.elitismRate * self.maxPopulation), len(new_population)):
-        self.mutate(new_population[i].genome)
-        
+    parity_ok, parity_error = self.nn.check_numpy_parity(self.population[0])
+    if not parity_ok:
+      raise RuntimeError(f"NumPy policy differs from the Keras model by {parity_error}")
+
+    self.run(target_points)
+
+  def resume(self, checkpoint_path=CHECKPOINT_PATH):
+    """
+    Restarts a run from its last checkpoint, continuing with the generation
+    after it. The population, fitness, RNG, episode horizon and lineage ids
+    are restored; the surrogate and novelty archive are not saved and start
+    empty again.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint['generation'] + 1 >= self.generationMax:
+      print(f"Checkpoint {checkpoint_path} is from the last generation, nothing left to resume.")
+      return
+    self.population = checkpoint['population']
+    self.fitness = checkpoint['fitness']
+    self.ids = checkpoint['ids']
+    self.parentIds = checkpoint['parent_ids']
+    self.rng.bit_generator.state = checkpoint['rng_state']
+    if checkpoint['horizon'] is not None:
+      self.horizon = checkpoint['horizon']
+    self.breed()
+    self.run(checkpoint['target_points'], checkpoint['generation'] + 1)
+
+  def run(self, target_points, first_generation=0):
+    """Starts the evaluation workers, fitness cache and checkpoint writer and runs the generation loop"""
+    if STEADY_STATE and SELECTION_MODE != 'fitness':
+      raise ValueError(f"'{SELECTION_MODE}' selection ranks whole generations and cannot run in steady-state mode")
+    self.pool = EvaluationPool(self.input_dim, self.output_dim, target_points)
+    self.fitness_cache = FitnessCache(self.evaluation_config(), FITNESS_CACHE_SIZE)
+    self.checkpoint_writer = CheckpointWriter(CHECKPOINT_PATH)
+    if SURROGATE_SCREENING > 1:
+      self.surrogate = RidgeSurrogate(self.genomeSize)
+    if LINEAGE_PATH:
+      self.lineage = LineageArchive(LINEAGE_PATH, self.genomeSize, RECORD_DTYPE, len(target_points))
+    try:
+      if STEADY_STATE:
+        self.run_steady_state(first_generation)
+      else:
+        self.run_generations(first_generation)
+    finally:
+      self.checkpoint_writer.close()
+      self.pool.close()
+      self.shared_population.close()
+      if self.lineage is not None:
+        self.lineage.close()
+
+  def evaluation_config(self):
+    """Everything besides the genome that determines an evaluation's result, used to key the fitness cache"""
+    return (self.input_dim, self.output_dim, self.pool.target_points, EPISODE_TIME_S, STEP_FREQUENCY_HZ, self.horizon)
+
+  def update_horizon(self, generation):
+    """
+    Sets the number of steps flown per episode in this generation from
+    HORIZON_SCHEDULE. Cached evaluations and racing bounds are dropped when it changes, since
+    they were flown with a different horizon.
+    """
+    full_steps = EPISODE_TIME_S * STEP_FREQUENCY_HZ
+    min_steps = HORIZON_MIN_S * STEP_FREQUENCY_HZ
+    horizon = self.horizon
+    if HORIZON_SCHEDULE == 'linear':
+      progress = min(generation / HORIZON_RAMP_GENERATIONS, 1)
+      horizon = int(round(min_steps + progress * (full_steps - min_steps)))
+    elif HORIZON_SCHEDULE == 'adaptive' and self.survivalRate is not None:
+      if self.survivalRate >= HORIZON_SURVIVAL_RATE:
+        horizon = min(self.horizon + HORIZON_STEP_S * STEP_FREQUENCY_HZ, full_steps)
+      # Each evaluated generation can grow the horizon only once
+      self.survivalRate = None
+    elif HORIZON_SCHEDULE != 'adaptive':
+      horizon = full_steps
+
+    if horizon != self.horizon:
+      self.horizon = horizon
+      self.targetBest = None
+      if self.fitness_cache is not None:
+        self.fitness_cache = FitnessCache(self.evaluation_config(), FITNESS_CACHE_SIZE)
+      print(f'Generation {generation}, Episode horizon: {self.horizon / STEP_FREQUENCY_HZ:.1f} s')
+
+  def run_generations(self, first_generation=0):
+    """Evaluates and breeds the population until generationMax"""
+    for i in range(first_generation, self.generationMax):
+      self.update_horizon(i)
+      self.parallel_simulation() 
+      self.archive_lineage(i)
+      self.end_generation(i)
+      self.breed()
       K.clear_session()
-        
-      self.population.clear()
-      self.population = new_population
 
-      for individual in new_population:
-        individual.log.clear()
-        individual.pry.clear()
+  def run_steady_state(self, first_generation=0):
+    """
+    Steady-state GA without a generational barrier: as soon as any evaluation
+    finishes, its offspring replaces the worst member of the population and a
+    new offspring is bred by tournament and sent to the freed worker. Every
+    maxPopulation finished evaluations count as one generation for logging.
+    """
+    self.update_horizon(first_generation)
+    self.parallel_simulation()
+    self.archive_lineage(first_generation)
+    self.end_generation(first_generation)
+    in_flight = {}
+    for _ in range(STEADY_STATE_IN_FLIGHT * self.pool.num_workers):
+      self.dispatch_offspring(in_flight)
+
+    for i in range(first_generation + 1, self.generationMax):
+      self.update_horizon(i)
+      completed = 0
+      while completed < self.maxPopulation:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+          genome, parent_ids = in_flight.pop(future)
+          genome_id = -1
+          try:
+            records = future.result()
+            fitness = float(self.setFitness(records).mean())
+            if self.fitness_cache is not None:
+              self.fitness_cache.put(genome, records[0])
+            if self.surrogate is not None:
+              self.surrogate.add(genome[None], [fitness])
+            if self.lineage is not None:
+              genome_id = self.lineage.append(i, genome[None], parent_ids[None], [fitness], records)[0]
+          except Exception as e:
+            print(f"Error in parallel simulation: {e}")
+            fitness = -np.inf
+          worst = np.argmin(self.fitness)
+          self.population[worst] = genome
+          self.fitness[worst] = fitness
+          self.ids[worst] = genome_id
+          self.parentIds[worst] = parent_ids
+          completed += 1
+          self.dispatch_offspring(in_flight)
+      self.end_generation(i)
+      K.clear_session()
+
+    wait(in_flight)
+
+  def dispatch_offspring(self, in_flight):
+    """Breeds one offspring from the current population and queues it for evaluation"""
+    offspring, parents = self.make_offspring(1)
+    in_flight[self.pool.submit(offspring, None, self.horizon)] = (offspring[0], self.ids[parents[0]])
+
+  def archive_lineage(self, generation):
+    """Adds the population rows evaluated for the first time in this generation to the lineage archive"""
+    if self.lineage is None:
+      return
+    new = np.flatnonzero((self.ids < 0) & (self.flown_targets == self.records.shape[1]))
+    fitness = self.setFitness(self.records[new]).mean(axis=1)
+    self.ids[new] = self.lineage.append(generation, self.population[new], self.parentIds[new], fitness, self.records[new])
+
+  def objective_fitness(self):
+    """Mean setFitness of every population row, -inf for rows not flown on every target point"""
+    fitness = np.full(len(self.population), -np.inf)
+    complete = self.flown_targets == len(self.pool.target_points)
+    fitness[complete] = self.setFitness(self.records[complete]).mean(axis=1)
+    return fitness
+
+  def end_generation(self, i):
+    """Sorts the evaluated population, saves the logs of its best individual and checkpoints it"""
+    # Pareto and novelty selection keys are not fitness, so the saved and logged individual is the best by setFitness
+    fitness = self.fitness if SELECTION_MODE == 'fitness' else self.objective_fitness()
+    best = int(np.argmax(fitness))
+    best_genome = self.population[best].copy()
+    self.sort_population()
+
+    # Only the saved individual is flown again to produce its trajectory logs
+    if self.bestIndividual is None or not np.array_equal(self.bestIndividual.genome, best_genome):
+      self.bestIndividual = self.pool.record(best_genome)
+    self.bestIndividual.fitness = fitness[best]
+      
+    if self.bestIndividual != None:
+      best_model = self.nn.genome_to_model(self.bestIndividual.genome)
+      best_model.save("best_model.h5")
+      save_logs(self.bestIndividual)
+      save_fitness_log(self.bestIndividual, i)
+      save_pry(self.bestIndividual)
+      save_avg_fitness_log(i, fitness)
+      
+      #output_folder = "log_files"
+      #for episode_number, episode_data in self.bestIndividual.ardupilot_log.items():
+      #  output_file = os.path.join(output_folder, f"simulation_{episode_number}.tlog")
+      #  observations_to_tlog(episode_data, 1, output_file)
+            
+      print(f'Generation {i}, Best Fitness: {self.bestIndividual.fitness}')
+
+    if self.lineage is not None:
+      self.lineage.flush()
+
+    if (i + 1) % CHECKPOINT_INTERVAL == 0 or i + 1 == self.generationMax:
+      self.checkpoint_writer.save(self.population, self.fitness, self.rng, i, self.pool.target_points,
+                                  self.ids, self.parentIds, self.horizon)
+
+  def make_offspring(self, count):
+    """
+    Breeds `count` mutated offspring by tournament selection and crossover and
+    returns them with the [count, 2] population rows of their parents.
+    Once the surrogate has enough samples, SURROGATE_SCREENING times as many
+    candidates are bred and only the best predicted ones (plus a few random
+    ones) are kept for the expensive simulation.
+    """
+    screening = self.surrogate is not None and len(self.surrogate) >= SURROGATE_MIN_SAMPLES
+    candidate_count = count * SURROGATE_SCREENING if screening else count
+    pair_count = (candidate_count + 1) // 2
+    parents1 = self.tournament_selection(pair_count)
+    parents2 = self.tournament_selection(pair_count)
+    candidates = self.crossover(parents1, parents2)[:candidate_count]
+    # Both children of a pair share its parents
+    parents = np.repeat(np.stack((parents1, parents2), axis=1), 2, axis=0)[:candidate_count]
+    self.mutate(candidates)
+    if not screening:
+      return candidates, parents
+
+    explore_count = int(SURROGATE_EXPLORATION * count)
+    ranked = np.argsort(-self.surrogate.predict(candidates), kind='stable')
+    chosen = ranked[:count - explore_count]
+    if explore_count:
+      chosen = np.concatenate((chosen, self.rng.choice(ranked[len(chosen):], explore_count, replace=False)))
+    return candidates[chosen], parents[chosen]
+
+  def breed(self):
+    """Replaces the evaluated population with its elite plus mutated offspring"""
+    elite = self.keep_elite()
+    offspring, parents = self.make_offspring(self.maxPopulation - len(elite))
+      
+    self.population = np.concatenate((self.population[elite], offspring))
+    self.parentIds = np.concatenate((self.parentIds[elite], self.ids[parents]))
+    self.ids = np.concatenate((self.ids[elite], np.full(len(offspring), -1, dtype=np.int64)))
+    self.fitness = np.full(self.maxPopulation, np.nan)
+      
+      
+""" ISLAND MODEL """
+def migration_source(island_index, island_count, generation, topology=MIGRATION_TOPOLOGY):
+  """Returns the island whose migrants `island_index` receives at this generation."""
+  if topology == 'ring':
+    return (island_index - 1) % island_count
+  if topology == 'random_ring':
+    # Every island derives the same ring order from the generation number
+    order = np.random.default_rng(generation).permutation(island_count)
+    position = int(np.flatnonzero(order == island_index)[0])
+    return int(order[position - 1])
+  raise ValueError(f"Unknown migration topology: {topology}")
+
+def run_island(island_index, island_count, ga_args, target_points, seed, shm_name, barrier, results):
+  """Evolves one island's sub-population with its own simulations, exchanging migrants over shared memory."""
+  ga, shm = None, None
+  try:
+    ga = Genetic_Algorithm(*ga_args)
+    ga.rng = np.random.default_rng([seed, island_index])
+    ga.pool = LocalEvaluationPool(ga.input_dim, ga.output_dim, target_points)
+    ga.fitness_cache = FitnessCache(ga.evaluation_config(), FITNESS_CACHE_SIZE)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    migrant_genomes = np.ndarray((island_count, MIGRANT_COUNT, ga.genomeSize), dtype=np.float32, buffer=shm.buf)
+    migrant_fitness = np.ndarray((island_count, MIGRANT_COUNT), dtype=np.float64, buffer=shm.buf,
+                                 offset=migrant_genomes.nbytes)
+    ga.generatePopulation()
+    migrating = True
+    for i in range(ga.generationMax):
+      ga.update_horizon(i)
+      ga.parallel_simulation()
+      ga.sort_population()
+      print(f'Island {island_index}, Generation {i}, Best Fitness: {ga.fitness[0]}')
+
+      if migrating and (i + 1) % MIGRATION_INTERVAL == 0 and i + 1 < ga.generationMax:
+        migrant_genomes[island_index] = ga.population[:MIGRANT_COUNT]
+        migrant_fitness[island_index] = ga.fitness[:MIGRANT_COUNT]
+        try:
+          barrier.wait()
+          source = migration_source(island_index, island_count, i)
+          # Migrants replace the worst members, keeping their already known fitness
+          ga.population[-MIGRANT_COUNT:] = migrant_genomes[source]
+          ga.fitness[-MIGRANT_COUNT:] = migrant_fitness[source]
+          barrier.wait()
+        except threading.BrokenBarrierError:
+          # Another island failed: keep evolving this one on its own
+          print(f"Island {island_index}: migration stopped after another island failed")
+          migrating = False
+        ga.sort_population()
+
+      if i + 1 < ga.generationMax:
+        ga.breed()
+    results.put((island_index, ga.population[0].copy(), float(ga.fitness[0])))
+  except Exception:
+    # Release the other islands from the migration barrier and report no result
+    barrier.abort()
+    results.put((island_index, None, -np.inf))
+    raise
+  finally:
+    if ga is not None:
+      if ga.pool is not None:
+        ga.pool.close()
+      ga.shared_population.close()
+    if shm is not None:
+      shm.close()
+
+
+class Island_Model(Genetic_Algorithm):
+  """
+  Splits maxPopulation into islands evolved independently in their own
+  processes, with MIGRANT_COUNT individuals moving between neighbouring
+  islands every MIGRATION_INTERVAL generations.
+  """
+
+  def __init__(self, input_dim, output_dim, maxPopulation, generationMax, mutationProb, tournamentSize, elitismRate,
+               islandCount=ISLAND_COUNT):
+    super().__init__(input_dim, output_dim, maxPopulation, generationMax, mutationProb, tournamentSize, elitismRate)
+    self.islandCount = islandCount
+
+  def evolve(self):
+    target_points = self.create_target_points(START_LAT, START_LON)
+    island_args = (self.input_dim, self.output_dim, self.maxPopulation // self.islandCount, self.generationMax,
+                   self.mutationProb, self.tournamentSize, self.elitismRate)
+    seed = int(self.rng.integers(2 ** 32))
+    context = multiprocessing.get_context('spawn')
+    genome_bytes = self.islandCount * MIGRANT_COUNT * self.genomeSize * np.dtype(np.float32).itemsize
+    fitness_bytes = self.islandCount * MIGRANT_COUNT * np.dtype(np.float64).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=genome_bytes + fitness_bytes)
+    barrier = context.Barrier(self.islandCount)
+    results = context.Queue()
+    islands = [context.Process(target=run_island,
+                               args=(index, self.islandCount, island_args, target_points, seed, shm.name, barrier, results))
+               for index in range(self.islandCount)]
+    try:
+      for island in islands:
+        island.start()
+      island_results = self.collect_results(islands, barrier, results)
+      for island in islands:
+        island.join()
+    finally:
+      shm.close()
+      shm.unlink()
+
+    _, best_genome, best_fitness = max(island_results, key=lambda result: result[2])
+    if best_genome is None:
+      raise RuntimeError('Every island failed.')
+    self.nn.genome_to_model(best_genome).save("best_model.h5")
+    print(f'Island model finished, Best Fitness: {best_fitness}')
+
+  @staticmethod
+  def collect_results(islands, barrier, results):
+    """
+    Waits for every island's result. An island that exits without one, e.g.
+    killed by a crashing simulation, is reported as failed and the barrier is
+    aborted so the others are not left waiting for it at a migration.
+    """
+    island_results = {}
+    while len(island_results) < len(islands):
+      try:
+        result = results.get(timeout=ISLAND_POLL_S)
+        island_results[result[0]] = result
+      except queue.Empty:
+        for index, island in enumerate(islands):
+          if index not in island_results and not island.is_alive():
+            print(f"Error in island {index}: exited with code {island.exitcode} without a result")
+            barrier.abort()
+            island_results[index] = (index, None, -np.inf)
+    return list(island_results.values())
       
       
 """ LOGS """
@@ -403,12 +1198,8 @@ def save_fitness_log(bestIndividual, gen):
   with open("fitness_evolution.txt", "a") as log_file:
     log_file.write(f"Generation {gen}: {bestIndividual.fitness}\n")
 
-def save_avg_fitness_log(gen, population):
-  avg = 0
-  for individual in population:
-    avg += individual.fitness
-
-  avg /= len(population)
+def save_avg_fitness_log(gen, fitness):
+  avg = np.mean(fitness[np.isfinite(fitness)])
 
   with open("fitness_avg_evolution.txt", "a") as log_file:
     log_file.write(f"Generation {gen}: {avg}\n")
@@ -539,5 +1330,9 @@ def observations_to_tlog(observations, timestep_sec, output_file):
 
 if __name__ == "__main__":
   GA = Genetic_Algorithm(8, 4, 100, 1500, 0.1, 5, 0.15)
-  GA.evolve()
+  # Resuming is opt-in, so a checkpoint left by an earlier run never blocks a fresh one
+  if '--resume' in sys.argv[1:]:
+    GA.resume()
+  else:
+    GA.evolve()
   
\ No newline at end of file
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class RidgeSurrogate:
+  """
+  Online ridge regression from genomes to fitness, used to rank candidate
+  offspring before any of them is flown. Genomes are reduced to a fixed random
+  projection so fitting stays a small [features, features] solve however long
+  the genome is, and only the most recent `capacity` samples are kept.
+  """
+
+  def __init__(self, genome_size, features=256, capacity=5000, regularization=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    self.projection = rng.standard_normal((genome_size, features), dtype=np.float32) / np.sqrt(features)
+    self.features = np.empty((capacity, features), dtype=np.float64)
+    self.targets = np.empty(capacity)
+    self.capacity = capacity
+    self.regularization = regularization
+    self.count = 0  # Samples ever added; the buffer holds the last min(count, capacity)
+    self.weights = None
+    self.bias = 0.0
+    self.stale = True
+
+  def __len__(self):
+    return min(self.count, self.capacity)
+
+  def add(self, genomes, fitness):
+    """Stores finite (genome, fitness) pairs, overwriting the oldest samples once full."""
+    fitness = np.asarray(fitness, dtype=np.float64)
+    finite = np.isfinite(fitness)
+    if not finite.any():
+      return
+    slots = (self.count + np.arange(np.count_nonzero(finite))) % self.capacity
+    self.features[slots] = genomes[finite] @ self.projection
+    self.targets[slots] = fitness[finite]
+    self.count += len(slots)
+    self.stale = True
+
+  def fit(self):
+    """Solves the ridge normal equations on the stored samples."""
+    n = len(self)
+    x = self.features[:n]
+    y = self.targets[:n]
+    x_mean = x.mean(axis=0)
+    y_mean = y.mean()
+    centered = x - x_mean
+    gram = centered.T @ centered
+    gram[np.diag_indices_from(gram)] += self.regularization * n
+    self.weights = np.linalg.solve(gram, centered.T @ (y - y_mean))
+    self.bias = y_mean - x_mean @ self.weights
+    self.stale = False
+
+  def predict(self, genomes):
+    """Predicted fitness of each genome row, refitting first if samples were added since the last fit."""
+    if self.stale:
+      self.fit()
+    return (genomes @ self.projection) @ self.weights + self.bias
@@ -0,0 +1,131 @@
+from controller.scripts.genetic_algo.simulation import (Genetic_Algorithm, EvaluationPool, FITNESS_CACHE_SIZE, NUM_THREADS,
+                                                        START_LAT, START_LON)
+from controller.scripts.genetic_algo.fitness_cache import FitnessCache
+import csv
+import itertools
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+SWEEP_CORES = NUM_THREADS  # Evaluation worker processes shared by every run of the sweep
+SWEEP_CONCURRENT_RUNS = 2 * SWEEP_CORES  # GA runs stepping at once, so the shared workers always have queued work
+SWEEP_GRACE_GENERATIONS = 20  # Generations every run gets before it can be stopped
+SWEEP_CHECK_INTERVAL = 10  # Generations between early-stopping checks
+SWEEP_RESULTS_PATH = 'sweep_results.csv'
+
+BASE_ARGS = {'input_dim': 8, 'output_dim': 4, 'maxPopulation': 100, 'generationMax': 200,
+             'mutationProb': 0.1, 'tournamentSize': 5, 'elitismRate': 0.15}
+
+
+def grid_configs(space):
+  """Every combination of a {parameter: [values]} search space."""
+  names = list(space)
+  return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_configs(space, n, rng):
+  """
+  `n` random draws from a search space where a list is a set of choices and
+  a (low, high) tuple a uniform range (integer if both bounds are integers).
+  """
+  configs = []
+  for _ in range(n):
+    config = {}
+    for name, values in space.items():
+      if isinstance(values, tuple):
+        low, high = values
+        config[name] = int(rng.integers(low, high + 1)) if isinstance(low, int) and isinstance(high, int) \
+          else float(rng.uniform(low, high))
+      else:
+        config[name] = values[int(rng.integers(len(values)))]
+    configs.append(config)
+  return configs
+
+
+class MedianStopper:
+  """
+  Median stopping rule: at every check a run whose best fitness so far is
+  below the median of what the other runs had reached at the same
+  generation is dominated and stopped.
+  """
+
+  def __init__(self, grace=SWEEP_GRACE_GENERATIONS, interval=SWEEP_CHECK_INTERVAL):
+    self.grace = grace
+    self.interval = interval
+    self.history = {}
+    self.lock = threading.Lock()
+
+  def report(self, run, generation, best_fitness):
+    """Records a run's best fitness so far and returns True if the run should stop."""
+    with self.lock:
+      history = self.history.setdefault(run, [])
+      history.append(max(best_fitness, history[-1]) if history else best_fitness)
+      if generation < self.grace or (generation + 1) % self.interval:
+        return False
+      others = [other[generation] for key, other in self.history.items() if key != run and len(other) > generation]
+      return bool(others) and history[-1] < np.median(others)
+
+
+def run_trial(run, params, pool, stopper, seed):
+  """Evolves one GA configuration on the shared evaluation pool and returns its row of the results table."""
+  ga = Genetic_Algorithm(**{**BASE_ARGS, **params})
+  ga.rng = np.random.default_rng([seed, run])
+  ga.pool = pool
+  ga.fitness_cache = FitnessCache(ga.evaluation_config(), FITNESS_CACHE_SIZE)
+  start = time.time()
+  stopped = False
+  ga.generatePopulation()
+  try:
+    for i in range(ga.generationMax):
+      ga.update_horizon(i)
+      ga.parallel_simulation()
+      ga.sort_population()
+      print(f'Run {run}, Generation {i}, Best Fitness: {ga.fitness[0]}')
+      if stopper.report(run, i, float(ga.fitness[0])):
+        stopped = True
+        break
+      if i + 1 < ga.generationMax:
+        ga.breed()
+  finally:
+    ga.shared_population.close()
+
+  finite = ga.fitness[np.isfinite(ga.fitness)]
+  return {'run': run, **params, 'generations': i + 1, 'best_fitness': max(stopper.history[run]),
+          'final_avg_fitness': float(finite.mean()) if len(finite) else float('-inf'),
+          'stopped_early': stopped, 'wall_time_s': round(time.time() - start, 1)}
+
+def run_sweep(configs, results_path=SWEEP_RESULTS_PATH, cores=SWEEP_CORES, concurrent_runs=SWEEP_CONCURRENT_RUNS, seed=None):
+  """
+  Runs every configuration as its own GA, `concurrent_runs` at a time, all
+  sharing one pool of `cores` evaluation workers, and writes one row per
+  run, best first, to a CSV table.
+  """
+  seed = int(np.random.default_rng(seed).integers(2 ** 32))
+  target_points = Genetic_Algorithm.create_target_points(START_LAT, START_LON)
+  pool = EvaluationPool(BASE_ARGS['input_dim'], BASE_ARGS['output_dim'], target_points, num_workers=cores)
+  stopper = MedianStopper()
+  rows = []
+  try:
+    with ThreadPoolExecutor(max_workers=concurrent_runs) as runner:
+      futures = {runner.submit(run_trial, run, params, pool, stopper, seed): run for run, params in enumerate(configs)}
+      for future in as_completed(futures):
+        try:
+          rows.append(future.result())
+        except Exception as e:
+          print(f"Error in sweep run {futures[future]}: {e}")
+  finally:
+    pool.close()
+
+  rows.sort(key=lambda row: row['best_fitness'], reverse=True)
+  fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+  with open(results_path, 'w', newline='') as file:
+    writer = csv.DictWriter(file, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+  return rows
+
+
+if __name__ == "__main__":
+  SPACE = {'mutationProb': [0.05, 0.1, 0.2], 'tournamentSize': [3, 5, 8], 'elitismRate': [0.05, 0.15]}
+  run_sweep(grid_configs(SPACE))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('tensorflow')
+
+from controller.scripts.genetic_algo.neural_network import NeuralNetwork, NumpyPolicy
+
+INPUT_DIM, OUTPUT_DIM = 8, 4
+ATOL = 1e-4  # Largest output difference allowed between the NumPy and Keras forward passes
+
+
+@pytest.fixture(scope='module')
+def network():
+  return NeuralNetwork(INPUT_DIM, OUTPUT_DIM)
+
+@pytest.fixture(scope='module')
+def policy():
+  return NumpyPolicy(INPUT_DIM, OUTPUT_DIM)
+
+
+def test_genome_size_matches_keras(network, policy):
+  assert policy.genome_size == len(network.model_to_genome(network.model))
+
+def test_predict_matches_keras(network, policy):
+  rng = np.random.default_rng(0)
+  genome = rng.standard_normal(policy.genome_size, dtype=np.float32)
+  inputs = rng.uniform(-1, 1, size=(64, INPUT_DIM)).astype(np.float32)
+  keras_output = network.genome_to_model(genome).predict(inputs, verbose=0)
+  np.testing.assert_allclose(policy.predict(genome, inputs), keras_output, atol=ATOL)
+
+def test_predict_batch_matches_keras(network, policy):
+  rng = np.random.default_rng(1)
+  genomes = rng.standard_normal((5, policy.genome_size), dtype=np.float32)
+  inputs = rng.uniform(-1, 1, size=(5, INPUT_DIM)).astype(np.float32)
+  keras_output = np.concatenate([network.genome_to_model(genome).predict(inputs[i:i + 1], verbose=0)
+                                 for i, genome in enumerate(genomes)])
+  np.testing.assert_allclose(policy.predict_batch(genomes, inputs), keras_output, atol=ATOL)
+
+def test_check_numpy_parity_accepts_matching_genome(network, policy):
+  genome = np.random.default_rng(2).standard_normal(policy.genome_size, dtype=np.float32)
+  parity_ok, max_error = network.check_numpy_parity(genome)
+  assert parity_ok, max_error
@@ -0,0 +1,82 @@
+from concurrent.futures import Future
+import numpy as np
+import pytest
+
+pytest.importorskip('tensorflow')
+pytest.importorskip('gym_jsbsim')
+
+from controller.scripts.genetic_algo import simulation
+from controller.scripts.genetic_algo.simulation import (CIRCLE_RADIUS, HORIZON_PROGRESS_SCORE, RECORD_DTYPE,
+                                                        Genetic_Algorithm, reachable_distance)
+
+
+class ScorePool:
+  """
+  Evaluation pool returning one-step records whose fitness under a horizon
+  schedule is exactly scores[row, target]: positive scores are progress
+  towards the target, negative ones altitude error.
+  """
+
+  def __init__(self, scores):
+    self.scores = scores
+    self.target_points = [(0.0, 0.0)] * scores.shape[1]
+    self.num_workers = 1
+    self.flown = 0
+
+  def submit_row_chunks(self, shared, rows, target_index=None, max_steps=None):
+    targets = list(range(self.scores.shape[1])) if target_index is None else [target_index]
+    records = np.zeros((len(rows), len(targets)), dtype=RECORD_DTYPE)
+    scores = self.scores[np.ix_(rows, targets)]
+    records['steps'] = 1
+    records['distance'] = CIRCLE_RADIUS - np.maximum(scores, 0) / HORIZON_PROGRESS_SCORE * reachable_distance(max_steps)
+    records['altitude_error'] = -np.minimum(scores, 0)
+    self.flown += records.size
+    future = Future()
+    future.set_result(records)
+    return {future: slice(0, len(rows))}
+
+
+def raced_ga(monkeypatch, scores, elitism_rate=0.15):
+  monkeypatch.setattr(simulation, 'RACING', True)
+  monkeypatch.setattr(simulation, 'RACING_BOUND', 'exact')
+  monkeypatch.setattr(simulation, 'HORIZON_SCHEDULE', 'linear')
+  ga = Genetic_Algorithm(8, 4, len(scores), 1, 0.1, 5, elitism_rate)
+  ga.generatePopulation()
+  ga.pool = ScorePool(scores)
+  try:
+    ga.parallel_simulation()
+  finally:
+    ga.shared_population.close()
+  return ga
+
+def exhaustive_elite(scores, elitism_rate=0.15):
+  return set(np.argsort(-scores.mean(axis=1), kind='stable')[:int(elitism_rate * len(scores))])
+
+
+def test_racing_keeps_an_elite_that_starts_badly(monkeypatch):
+  rng = np.random.default_rng(0)
+  scores = np.empty((20, 3))
+  scores[:, 0] = rng.uniform(-100, 0, size=20)
+  scores[:, 1:] = rng.uniform(-400, -200, size=(20, 2))
+  scores[7] = (-300, 0, 0)
+  ga = raced_ga(monkeypatch, scores)
+  elite = set(ga.keep_elite())
+  assert 7 in elite
+  assert elite == exhaustive_elite(scores)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_raced_elites_match_exhaustive_evaluation(monkeypatch, seed):
+  rng = np.random.default_rng(seed)
+  scores = rng.uniform(-1000, 0, size=(40, 5)) + rng.uniform(-500, 0, size=(40, 1))
+  ga = raced_ga(monkeypatch, scores)
+  elite = set(ga.keep_elite())
+  assert elite == exhaustive_elite(scores)
+  np.testing.assert_allclose(ga.fitness[list(elite)], scores[list(elite)].mean(axis=1))
+
+def test_racing_stops_hopeless_individuals(monkeypatch):
+  rng = np.random.default_rng(0)
+  scores = rng.uniform(0, 100, size=(40, 5))
+  scores[:10] = rng.uniform(950, 1000, size=(10, 5))
+  ga = raced_ga(monkeypatch, scores)
+  assert set(ga.keep_elite()) == exhaustive_elite(scores)
+  assert ga.pool.flown < scores.size
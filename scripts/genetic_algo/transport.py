@@ -0,0 +1,54 @@
+import numpy as np
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+
+MAX_ATTACHED_BLOCKS = 8  # Shared genome blocks a worker keeps mapped (one per GA using the pool)
+
+
+class SharedGenomes:
+  """
+  A population matrix published in shared memory, so evaluation workers read
+  genome rows by index instead of receiving them pickled with every work
+  item. The block is reallocated only when a larger population is published.
+  """
+
+  def __init__(self):
+    self.shm = None
+    self.genomes = None
+
+  @property
+  def name(self):
+    return self.shm.name
+
+  @property
+  def shape(self):
+    return self.genomes.shape
+
+  def publish(self, population):
+    """Copies the population into the shared block, reallocating it if it has outgrown it."""
+    if self.shm is None or self.shm.size < population.nbytes:
+      self.close()
+      self.shm = shared_memory.SharedMemory(create=True, size=max(population.nbytes, 1))
+    self.genomes = np.ndarray(population.shape, dtype=population.dtype, buffer=self.shm.buf)
+    self.genomes[:] = population
+
+  def close(self):
+    if self.shm is not None:
+      self.genomes = None
+      self.shm.close()
+      self.shm.unlink()
+      self.shm = None
+
+
+_attached = OrderedDict()
+
+def read_shared_rows(name, shape, dtype, rows):
+  """Worker side: copies rows out of a published population, keeping recently used blocks mapped."""
+  if name not in _attached:
+    _attached[name] = shared_memory.SharedMemory(name=name)
+    while len(_attached) > MAX_ATTACHED_BLOCKS:
+      _attached.popitem(last=False)[1].close()
+  _attached.move_to_end(name)
+  genomes = np.ndarray(shape, dtype=dtype, buffer=_attached[name].buf)
+  return genomes[rows]
@@ -4,11 +4,10 @@ import math
 import gc
 import time
 import os
-from gym_jsbsim.environment import JsbSimEnv
+from gym_jsbsim.environment import SharedMemoryVecEnv
 from gym_jsbsim.tasks import NavigationTask  
 from gym_jsbsim.aircraft import cessna172P
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import SubprocVecEnv
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 # Constants
@@ -27,6 +26,9 @@ MODEL_PATH = ""
 SAVE_PATH = "../models/ppo_navigation"
 
 NUM_CPU = 5
+ENVS_PER_CPU = 4  # Envs stepped back to back by each worker process
+NUM_ENVS = NUM_CPU * ENVS_PER_CPU
+ROLLOUT_STEPS = 20480  # Transitions collected across all envs per PPO update
 
 def calculate_circle_point(lat, lon, radius, angle):
     """Calculates a point on a circle given the center and radius."""
@@ -42,24 +44,19 @@ def create_target_points(start_lat, start_lon, radius, n_points):
     angles = np.linspace(0, 360, n_points, endpoint=False)
     return [calculate_circle_point(start_lat, start_lon, radius, angle) for angle in angles]
 
-def make_env(target_point):
-    """Function to create an individual JSBSim environment for multiprocessing."""
-    def _init():
-        return JsbSimEnv(
-            task_type=NavigationTask,
-            aircraft=cessna172P,
-            agent_interaction_freq=STEP_FREQUENCY_HZ,
-            shaping=None,
-            target_point=target_point
-        )
-    return _init
-
 if __name__ == "__main__":
     target_points = create_target_points(START_LAT, START_LON, CIRCLE_RADIUS, NUM_POINTS)
 
     def create_vec_env():
-        """Creates a vectorized environment using multiple CPU processes."""
-        return SubprocVecEnv([make_env(random.choice(target_points)) for _ in range(NUM_CPU)])
+        """Creates a vectorized environment whose CPU processes exchange steps through shared memory."""
+        return SharedMemoryVecEnv(
+            target_points=[random.choice(target_points) for _ in range(NUM_ENVS)],
+            num_workers=NUM_CPU,
+            task_type=NavigationTask,
+            aircraft=cessna172P,
+            agent_interaction_freq=STEP_FREQUENCY_HZ,
+            shaping=None
+        )
 
     print("Initializing environments...")
     vec_env = create_vec_env()
@@ -69,7 +66,7 @@ if __name__ == "__main__":
 
     # Define a checkpoint callback
     checkpoint_callback = CheckpointCallback(
-        save_freq=RESTART_INTERVAL,
+        save_freq=max(RESTART_INTERVAL // NUM_ENVS, 1),  # counted in vec env steps, one timestep per env
         save_path=os.path.dirname(SAVE_PATH),
         name_prefix="ppo_navigation",
         save_replay_buffer=True,
@@ -85,7 +82,7 @@ if __name__ == "__main__":
             "MlpPolicy",
             vec_env,
             learning_rate=3e-4,
-            n_steps=4096,
+            n_steps=ROLLOUT_STEPS // NUM_ENVS,
             batch_size=128,
             gae_lambda=0.95,
             gamma=0.99,
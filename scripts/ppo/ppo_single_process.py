@@ -6,9 +6,8 @@ import time
 import pandas as pd
 import matplotlib.pyplot as plt
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
 from stable_baselines3.common.callbacks import CheckpointCallback
-from gym_jsbsim.environment import JsbSimEnv
+from gym_jsbsim.environment import JsbSimVecEnv
 from gym_jsbsim.tasks import NavigationTask  
 from gym_jsbsim.aircraft import cessna172P
 import gym_jsbsim.properties as prp
@@ -24,17 +23,6 @@ TOTAL_TIMESTEPS = 10000000
 RESTART_INTERVAL = 2500000  
 SAVE_PATH = "../models/ppo_navigation"
 
-def create_env(target_point):
-    """Sets up the GymJSBSim environment for the navigation task."""
-    env = JsbSimEnv(
-        task_type=NavigationTask,
-        aircraft=cessna172P,
-        agent_interaction_freq=STEP_FREQUENCY_HZ,
-        shaping=None,
-        target_point=target_point
-    )
-    return env
-
 def calculate_circle_point(lat, lon, radius, angle):
     """Calculates a point on the surface of the Earth."""
     lat_rad, lon_rad, angle_rad = map(math.radians, (lat, lon, angle))
@@ -67,8 +55,14 @@ if __name__ == "__main__":
     target_point = target_points[0]  # Keep the target constant
     print(f"Training on Fixed Target Point: {target_point}")
 
-    # Create and wrap the environment
-    env = DummyVecEnv([lambda: create_env(target_point)])
+    # Create the vectorised environment (a single in-process simulation)
+    env = JsbSimVecEnv(
+        task_type=NavigationTask,
+        aircraft=cessna172P,
+        agent_interaction_freq=STEP_FREQUENCY_HZ,
+        shaping=None,
+        target_points=[target_point]
+    )
 
     # Load model or create a new one
     try: